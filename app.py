@@ -12,17 +12,35 @@ from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from collections import deque, defaultdict
 from enum import Enum
-import copy
+from types import MappingProxyType
 import json
 import os
+import random
+import multiprocessing as mp
+from multiprocessing.connection import Listener, Client
+import pickle
+import sqlite3
+import zlib
+from urllib.parse import urlsplit, parse_qsl, urlencode
+import bisect
+from contextlib import contextmanager
+import gzip
+import io
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import dash
-from dash import dcc, html, Input, Output, State, callback_context, dash_table
+from dash import dcc, html, Input, Output, State, callback_context, dash_table, no_update, Patch
 import dash_bootstrap_components as dbc
-import pandas as pd
 import websocket
 import ssl
 import requests
+from requests.adapters import HTTPAdapter
+from flask import Response, request
+try:
+    import orjson
+    _json_loads=orjson.loads
+except ImportError:
+    _json_loads=json.loads
 
 POLYGON_API_KEY = os.environ.get("POLYGON_API_KEY", "PnzhJOXEJO7tSpHr0ct2zjFKi6XO0yGi")
 
@@ -289,13 +307,33 @@ class Config:
     cache_refresh_interval: float = 0.5
     history_days: int = 5
     polygon_api_key: str = POLYGON_API_KEY
-    polygon_ws_url: str = "wss://delayed.polygon.io/stocks"
-    polygon_rest_url: str = "https://api.polygon.io"
+    polygon_ws_url: str = os.environ.get("POLYGON_WS_URL", "wss://delayed.polygon.io/stocks")
+    polygon_rest_url: str = os.environ.get("POLYGON_REST_URL", "https://api.polygon.io")
     volumes: Dict[str,float] = field(default_factory=dict)
     week52_data: Dict[str,Dict] = field(default_factory=dict)
     fundamental_data: Dict[str,Dict] = field(default_factory=dict)
     fundamental_slopes: Dict[str,Dict] = field(default_factory=dict)
     min_tradable_stasis: int = 3
+    vector_engine: bool = False
+    tick_mode: bool = False
+    tick_buffer: int = 4096
+    rest_concurrency: int = 16
+    rest_rate_limit: float = 50.0
+    rest_max_retries: int = 5
+    grouped_daily: bool = True
+    daily_refresh_interval: float = 3600.0
+    cache_path: str = "stasis_cache.db"
+    cache_ttl: Dict[str,float] = field(default_factory=lambda: {
+        'fundamentals':7*86400,'daily':6*3600,'minute':120})
+    checkpoint_path: str = "stasis_checkpoint"
+    checkpoint_interval: float = 300.0
+    shards: int = 0
+    reference_version: int = 0
+    role: str = os.environ.get("STASIS_ROLE", "all")
+    publish_address: str = os.environ.get("STASIS_PUBLISH", "127.0.0.1:8765")
+    publish_authkey: str = os.environ.get("STASIS_AUTHKEY", "")
+    record_path: str = os.environ.get("STASIS_RECORD", "")
+    stream_slots: int = int(os.environ.get("STASIS_STREAM_SLOTS", "8"))
 
 config = Config()
 config.symbols = list(dict.fromkeys(config.symbols))
@@ -316,7 +354,7 @@ class BitEntry:
     price: float
     timestamp: datetime
 
-@dataclass
+@dataclass(slots=True)
 class StasisInfo:
     start_time: datetime
     start_price: float
@@ -324,15 +362,78 @@ class StasisInfo:
     def get_duration(self) -> timedelta:
         return datetime.now() - self.start_time
     def get_duration_str(self) -> str:
-        t = int(self.get_duration().total_seconds())
-        if t < 60: return f"{t}s"
-        if t < 3600: return f"{t//60}m {t%60}s"
-        return f"{t//3600}h {(t%3600)//60}m"
+        return _fmt_duration(self.get_duration().total_seconds())
     def get_start_date_str(self) -> str:
         return self.start_time.strftime("%m/%d %H:%M")
     def get_price_change_pct(self, p: float) -> float:
         return (p - self.start_price) / self.start_price * 100 if self.start_price else 0
 
+def _fmt_duration(secs) -> str:
+    t = int(secs)
+    if t < 60: return f"{t}s"
+    if t < 3600: return f"{t//60}m {t%60}s"
+    return f"{t//3600}h {(t%3600)//60}m"
+
+HIST_LEN = 500
+_EPOCH = datetime(1970, 1, 1)
+
+def _to_ns(dt: datetime) -> int:
+    return (dt - _EPOCH) // timedelta(microseconds=1) * 1000
+
+def _from_ns(ns: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=int(ns) // 1000)
+
+def _tick_time(ms) -> datetime:
+    return datetime.fromtimestamp(ms/1000)
+
+def _ms_to_ns(ms):
+    ms=np.asarray(ms,dtype=np.int64); hours,inv=np.unique(ms//3600000,return_inverse=True)
+    off=np.array([(datetime.fromtimestamp(h*3600)-datetime(1970,1,1)).total_seconds()*1000-h*3600000 for h in hours.tolist()],dtype=np.int64)
+    return (ms+off[inv.ravel()])*1000000
+
+def _signal_strength(sc):
+    if sc>=10: return SignalStrength.VERY_STRONG
+    if sc>=7: return SignalStrength.STRONG
+    if sc>=5: return SignalStrength.MODERATE
+    if sc>=3: return SignalStrength.WEAK
+    return None
+
+class BitHistory:
+    __slots__=('maxlen','_bit','_price','_ns','_head','_len')
+    def __init__(self, maxlen=HIST_LEN, capacity=16):
+        self.maxlen=maxlen; cap=min(capacity,maxlen); self._head=0; self._len=0
+        self._bit=np.zeros(cap,dtype=np.int8); self._price=np.zeros(cap,dtype=np.float64)
+        self._ns=np.zeros(cap,dtype=np.int64)
+    def append(self, bit, price, ns):
+        cap=len(self._bit)
+        if self._len<cap: k=self._len; self._len+=1
+        elif cap<self.maxlen:
+            cap=min(cap*2,self.maxlen); k=self._len; self._len+=1
+            self._bit=np.resize(self._bit,cap); self._price=np.resize(self._price,cap); self._ns=np.resize(self._ns,cap)
+        else: k=self._head; self._head=(self._head+1)%cap
+        self._bit[k]=bit; self._price[k]=price; self._ns[k]=ns
+    @classmethod
+    def from_arrays(cls, bits, prices, ns, maxlen=HIST_LEN):
+        h=cls(maxlen,max(16,len(bits))); n=min(len(bits),maxlen); h._len=n
+        h._bit[:n]=bits[len(bits)-n:]; h._price[:n]=prices[len(bits)-n:]; h._ns[:n]=ns[len(bits)-n:]
+        return h
+    @property
+    def last(self):
+        return int(self._bit[(self._head+self._len-1)%len(self._bit)]) if self._len else None
+    def arrays(self):
+        o=np.arange(self._head,self._head+self._len)%len(self._bit)
+        return self._bit[o],self._price[o],self._ns[o]
+    def _entry(self, k):
+        return BitEntry(int(self._bit[k]),float(self._price[k]),_from_ns(self._ns[k]))
+    def __len__(self): return self._len
+    def __getitem__(self, i):
+        if isinstance(i,slice): return [self[j] for j in range(*i.indices(self._len))]
+        if i<0: i+=self._len
+        if not 0<=i<self._len: raise IndexError("bit history index out of range")
+        return self._entry((self._head+i)%len(self._bit))
+    def __iter__(self):
+        for i in range(self._len): yield self._entry((self._head+i)%len(self._bit))
+
 def calculate_52week_percentile(price, symbol):
     d = config.week52_data.get(symbol)
     if not d: return None
@@ -347,13 +448,185 @@ def fmt_rr(rr):
     if rr is None: return "—"
     return "0:1" if rr <= 0 else (f"{rr:.2f}:1" if rr < 10 else f"{rr:.0f}:1")
 
-def fetch_fundamental_data_polygon(sym):
+class Metrics:
+    BUCKETS=(0.0005,0.001,0.0025,0.005,0.01,0.025,0.05,0.1,0.25,0.5,1.0,2.5,5.0,10.0,30.0,60.0,300.0,900.0)
+    def __init__(self):
+        self.lock=threading.Lock(); self.hist={}; self.stages={}
+    def observe(self, name, v, **labels):
+        key=(name,tuple(sorted(labels.items())))
+        with self.lock:
+            h=self.hist.get(key)
+            if h is None: h=self.hist[key]=[[0]*len(self.BUCKETS),0.0,0]
+            i=bisect.bisect_left(self.BUCKETS,v)
+            if i<len(self.BUCKETS): h[0][i]+=1
+            h[1]+=v; h[2]+=1
+    @contextmanager
+    def timer(self, name, **labels):
+        t0=time.perf_counter()
+        try: yield
+        finally: self.observe(name,time.perf_counter()-t0,**labels)
+    @contextmanager
+    def locked(self, lock, name):
+        t0=time.perf_counter()
+        with lock:
+            self.observe('stasis_lock_wait_seconds',time.perf_counter()-t0,lock=name); yield
+    @contextmanager
+    def stage(self, name):
+        t0=time.perf_counter()
+        try: yield
+        finally: self.stages[name]=time.perf_counter()-t0
+    @staticmethod
+    def _labels(labels, extra=()):
+        items=list(labels)+list(extra)
+        return "{"+",".join(f'{k}="{v}"' for k,v in items)+"}" if items else ""
+    def render(self, gauges=(), counters=()):
+        # counters are read from the components that own them (feed, REST client, engine) at scrape time
+        out=[]; seen=set()
+        with self.lock: hist={k:(list(h[0]),h[1],h[2]) for k,h in self.hist.items()}
+        for (name,labels),(b,sm,n) in sorted(hist.items()):
+            if name not in seen: seen.add(name); out.append(f"# TYPE {name} histogram")
+            c=0
+            for le,x in zip(self.BUCKETS,b): c+=x; out.append(f"{name}_bucket{self._labels(labels,[('le',le)])} {c}")
+            out.append(f"{name}_bucket{self._labels(labels,[('le','+Inf')])} {n}")
+            out.append(f"{name}_sum{self._labels(labels)} {sm}"); out.append(f"{name}_count{self._labels(labels)} {n}")
+        for kind,samples in (('counter',counters),('gauge',gauges)):
+            for name,labels,v in samples:
+                if name not in seen: seen.add(name); out.append(f"# TYPE {name} {kind}")
+                out.append(f"{name}{self._labels(sorted(labels.items()))} {v}")
+        return "\n".join(out)+"\n"
+
+metrics = Metrics()
+
+class TokenBucket:
+    def __init__(self, rate, burst=None):
+        self.rate=float(rate); self.capacity=float(burst or max(1.0,rate)); self.tokens=self.capacity
+        self.updated=time.monotonic(); self.lock=threading.Lock()
+    def pause(self, seconds):
+        with self.lock: self.tokens=0.0; self.updated=max(self.updated,time.monotonic()+seconds)
+    def acquire(self):
+        if self.rate<=0: return
+        while True:
+            with self.lock:
+                now=time.monotonic()
+                if now>=self.updated:
+                    self.tokens=min(self.capacity,self.tokens+(now-self.updated)*self.rate); self.updated=now
+                    if self.tokens>=1: self.tokens-=1; return
+                    wait=(1-self.tokens)/self.rate
+                else: wait=self.updated-now
+            time.sleep(wait)
+
+class SessionRecorder:
+    def __init__(self, path):
+        os.makedirs(path,exist_ok=True); self.lock=threading.Lock()
+        meta=os.path.join(path,'meta.json')
+        if not os.path.exists(meta):
+            with open(meta,'w') as f: json.dump({'date':datetime.now().strftime('%Y-%m-%d'),'start_ms':int(time.time()*1000),'symbols':config.symbols},f)
+        self.frames=open(os.path.join(path,'frames.jsonl'),'a',buffering=1)
+        self.rest=open(os.path.join(path,'rest.jsonl'),'a',buffering=1)
+        print(f"⏺  Recording session to {path}")
+    @staticmethod
+    def key(url):
+        u=urlsplit(url); return u.path+'?'+urlencode(sorted((k,v) for k,v in parse_qsl(u.query) if k!='apiKey'))
+    def frame(self, msg):
+        line=json.dumps([int(time.time()*1000),msg if isinstance(msg,str) else msg.decode()])
+        with self.lock: self.frames.write(line+"\n")
+    def response(self, url, r):
+        line=json.dumps({'key':self.key(url),'status':r.status_code,'body':r.text})
+        with self.lock: self.rest.write(line+"\n")
+
+recorder = None
+
+class RestLoader:
+    def __init__(self, concurrency=None, rate=None, retries=None):
+        self.concurrency=concurrency or config.rest_concurrency
+        self.retries=config.rest_max_retries if retries is None else retries
+        self.bucket=TokenBucket(config.rest_rate_limit if rate is None else rate)
+        self.session=requests.Session()
+        ad=HTTPAdapter(pool_connections=4,pool_maxsize=self.concurrency)
+        self.session.mount("https://",ad); self.session.mount("http://",ad)
+        self.stage_times={}; self.retried=0
+    def get(self, url, timeout=15):
+        delay=0.5; r=None
+        for attempt in range(self.retries+1):
+            self.bucket.acquire()
+            try: r=self.session.get(url,timeout=timeout)
+            except requests.RequestException: r=None
+            if r is not None and r.status_code!=429 and r.status_code<500:
+                if recorder: recorder.response(url,r)
+                return r
+            if attempt==self.retries: break
+            wait=delay; self.retried+=1
+            if r is not None and r.status_code==429:
+                ra=r.headers.get('Retry-After','')
+                try: wait=max(delay,float(ra))
+                except ValueError: pass
+                self.bucket.pause(wait)
+            time.sleep(wait*(1+0.25*random.random())); delay=min(delay*2,30.0)
+        return r
+    def map(self, stage, items, fn, progress=None):
+        items=list(items); out={}; ok=fail=0; t0=time.time(); step=max(25,len(items)//20)
+        with ThreadPoolExecutor(max_workers=self.concurrency) as ex:
+            futs={ex.submit(fn,it):it for it in items}
+            for n,f in enumerate(as_completed(futs),1):
+                try: r=f.result()
+                except Exception: r=None
+                out[futs[f]]=r
+                if r is None: fail+=1
+                else: ok+=1
+                if progress: progress(n,len(items))
+                if n%step==0 or n==len(items): print(f"   {stage}: {n}/{len(items)} (✓{ok} ✗{fail})")
+        self.stage_times[stage]=time.time()-t0
+        print(f"   {stage}: {time.time()-t0:.1f}s"); return {it:out[it] for it in items}
+
+rest = RestLoader()
+
+class DataCache:
+    def __init__(self, path):
+        self.path=path; self.lock=threading.Lock()
+        d=os.path.dirname(path)
+        if d: os.makedirs(d,exist_ok=True)
+        self.db=sqlite3.connect(path,check_same_thread=False)
+        with self.lock, self.db:
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("CREATE TABLE IF NOT EXISTS entries (dataset TEXT, key TEXT, fetched REAL,"
+                " hwm TEXT, data BLOB, PRIMARY KEY (dataset, key))")
+    def get(self, dataset, key):
+        with self.lock:
+            row=self.db.execute("SELECT data,hwm,fetched FROM entries WHERE dataset=? AND key=?",(dataset,key)).fetchone()
+        return (zlib.decompress(row[0]),row[1],row[2]) if row else None
+    def put(self, dataset, key, data, hwm=None, fetched=None):
+        with self.lock, self.db:
+            self.db.execute("INSERT OR REPLACE INTO entries VALUES (?,?,?,?,?)",
+                (dataset,key,fetched or time.time(),hwm,zlib.compress(data,6)))
+    def touch(self, dataset, key):
+        with self.lock, self.db:
+            self.db.execute("UPDATE entries SET fetched=? WHERE dataset=? AND key=?",(time.time(),dataset,key))
+    def is_stale(self, dataset, fetched):
+        return time.time()-fetched>config.cache_ttl.get(dataset,0)
+    def get_json(self, dataset, key):
+        e=self.get(dataset,key)
+        return (json.loads(e[0]),e[1],e[2]) if e else None
+    def put_json(self, dataset, key, obj, hwm=None):
+        self.put(dataset,key,json.dumps(obj,separators=(',',':')).encode(),hwm)
+    def get_bars(self, key):
+        e=self.get('minute',key)
+        if not e: return None
+        a=np.frombuffer(e[0],dtype=np.float64); n=len(a)//2
+        return a[:n].astype(np.int64),a[n:].copy(),e[2]
+    def put_bars(self, key, t, c):
+        self.put('minute',key,np.concatenate([np.asarray(t,dtype=np.float64),np.asarray(c,dtype=np.float64)]).tobytes(),
+            str(int(t[-1])) if len(t) else None)
+
+disk_cache = None
+
+def fetch_fundamental_data_polygon(sym, since=None):
     try:
         url = (f"{config.polygon_rest_url}/vX/reference/financials"
                f"?ticker={sym}&timeframe=quarterly&limit=24"
                f"&sort=filing_date&order=desc&apiKey={config.polygon_api_key}")
-        resp = requests.get(url, timeout=30)
-        if resp.status_code != 200: return None
+        if since: url += f"&filing_date.gt={since}"
+        resp = rest.get(url, timeout=30)
+        if resp is None or resp.status_code != 200: return None
         results = resp.json().get('results', [])
         if not results: return None
         fund = {k: [] for k in ['dates','revenue','net_income','operating_cash_flow',
@@ -387,85 +660,129 @@ def fetch_fundamental_data_polygon(sym):
         return fund
     except: return None
 
-def calculate_slopes(series, ss=4, sl=20):
-    if not series or len(series)<5: return None,None
-    s=pd.Series(series).replace([np.inf,-np.inf],np.nan); s5=s20=None
-    try:
-        if len(s.dropna())>=5:
-            e=s.ewm(span=ss,adjust=False).mean()
-            if abs(e.iloc[-5])>0.0001: s5=(e.iloc[-1]-e.iloc[-5])/abs(e.iloc[-5])
-    except: pass
-    try:
-        if len(s.dropna())>=21:
-            e=s.ewm(span=sl,adjust=False).mean()
-            if abs(e.iloc[-21])>0.0001: s20=(e.iloc[-1]-e.iloc[-21])/abs(e.iloc[-21])
-    except: pass
-    return s5,s20
-
-def calculate_all_slopes(fund, ratios):
-    sl={}
-    sl['Rev_Slope_5'],sl['Rev_Slope_20']=calculate_slopes(fund.get('revenue',[]))
-    sl['FCF_Slope_5'],sl['FCF_Slope_20']=calculate_slopes(fund.get('fcf',[]))
-    for n,k in [('P/E Ratio','pe_ratio'),('Return on Equity','roe'),
-                ('Net Profit Margin','net_profit_margin'),('Debt to Equity Ratio','debt_to_equity')]:
-        sl[f'{n}_Slope_5'],sl[f'{n}_Slope_20']=calculate_slopes(ratios.get(k,[]))
-    fl=ratios.get('fcfy',[]); sl['FCFY']=fl[-1] if fl and fl[-1] is not None else None
-    return sl
+SLOPE_SERIES=(('Rev','revenue'),('FCF','fcf'),('P/E Ratio','pe_ratio'),('Return on Equity','roe'),
+    ('Net Profit Margin','net_profit_margin'),('Debt to Equity Ratio','debt_to_equity'))
+FUND_FIELDS=('revenue','net_income','fcf','shareholders_equity','total_debt','eps')
+
+def _ewm_mean(x, span):
+    a=1./(1.+(span-1)/2.); f=1.-a; w=x[:,0].copy(); ow=np.ones(len(x)); out=np.empty_like(x); out[:,0]=w
+    for j in range(1,x.shape[1]):
+        c=x[:,j]; obs=c==c; have=w==w
+        ow=np.where(have,ow*f,ow); upd=have&obs&(w!=c)
+        w=np.where(upd,(ow*w+a*c)/(ow+a),w); ow=np.where(have&obs,1.,ow)
+        w=np.where(~have&obs,c,w); out[:,j]=w
+    return out
+
+def _slopes(x, n, ss=4, sl=20):
+    x=np.where(np.isinf(x),np.nan,x); cnt=(x==x).sum(1); out=[]
+    for span,lag in ((ss,5),(sl,21)):
+        if x.shape[1]<lag: out.append([None]*len(x)); continue
+        e=_ewm_mean(x,span); b=e[:,-lag]
+        with np.errstate(invalid='ignore',divide='ignore'): v=(e[:,-1]-b)/np.abs(b)
+        ok=(n>=5)&(cnt>=lag)&(np.abs(b)>0.0001)
+        out.append([float(v[i]) if ok[i] else None for i in range(len(x))])
+    return out
+
+def fund_matrix(funds):
+    n=np.array([len(f['revenue']) for f in funds]); w=int(n.max()) if len(n) else 0
+    m={k:np.full((len(funds),w),np.nan) for k in FUND_FIELDS}
+    for i,f in enumerate(funds):
+        for k in FUND_FIELDS: m[k][i,w-n[i]:]=f[k]
+    return m,n
+
+def compute_fundamental_slopes(symbols, funds):
+    if not symbols: return {}
+    m,n=fund_matrix(funds); rev,ni,fcf,eq,debt,eps=(m[k] for k in FUND_FIELDS)
+    price=np.full(len(symbols),100.)
+    for i,sym in enumerate(symbols):
+        w=config.week52_data.get(sym,{})
+        if w.get('high') and w.get('low'): price[i]=(w['high']+w['low'])/2
+    mcap=np.where(eq[:,-1]>0,eq[:,-1]*2,1e9)
+    with np.errstate(invalid='ignore',divide='ignore'):
+        r={'revenue':rev,'fcf':fcf,
+            'pe_ratio':np.where(eps>0,price[:,None]/eps,np.nan),
+            'roe':np.where(eq>0,ni/eq,np.nan),
+            'net_profit_margin':np.where(rev!=0,ni/rev,np.nan),
+            'debt_to_equity':np.where(eq>0,debt/eq,np.nan)}
+        fcfy=((fcf[:,-4]+fcf[:,-3])+fcf[:,-2])+fcf[:,-1] if fcf.shape[1]>=4 else np.full(len(symbols),np.nan)
+        fcfy=fcfy/mcap
+    out={sym:{} for sym in symbols}
+    for name,k in SLOPE_SERIES:
+        s5,s20=_slopes(r[k],n)
+        for i,sym in enumerate(symbols): out[sym][f'{name}_Slope_5']=s5[i]; out[sym][f'{name}_Slope_20']=s20[i]
+    for i,sym in enumerate(symbols): out[sym]['FCFY']=float(fcfy[i]) if fcfy[i]==fcfy[i] else None
+    return out
+
+def recompute_fundamental_slopes():
+    syms=[s for s in config.symbols if s in config.fundamental_data]
+    config.fundamental_slopes.update(compute_fundamental_slopes(syms,[config.fundamental_data[s] for s in syms]))
+    config.reference_version+=1
+
+def _cached_fundamentals(sym, refresh=False):
+    ent=disk_cache.get_json('fundamentals',sym) if disk_cache else None
+    if ent and not refresh: return ent[0]
+    if ent:
+        new=fetch_fundamental_data_polygon(sym,since=ent[1])
+        if not new or not new.get('dates'): disk_cache.touch('fundamentals',sym); return ent[0]
+        fund={k:(ent[0].get(k,[])+new[k])[-24:] for k in new}
+    else: fund=fetch_fundamental_data_polygon(sym)
+    if fund and disk_cache and fund.get('dates'): disk_cache.put_json('fundamentals',sym,fund,fund['dates'][-1])
+    return fund
+
+def _load_fundamentals(sym, refresh=False):
+    fund=_cached_fundamentals(sym,refresh)
+    if not fund or len(fund.get('revenue',[]))<4: return None
+    return fund
+
+def _store_fundamentals(loaded):
+    syms=list(loaded)
+    for sym in syms: config.fundamental_data[sym]=loaded[sym]
+    config.fundamental_slopes.update(compute_fundamental_slopes(syms,[loaded[s] for s in syms]))
 
 def fetch_all_fundamental_data():
     print("\n📊 FETCHING FUNDAMENTAL DATA...")
-    ok=fail=0
-    for i,sym in enumerate(config.symbols):
-        try:
-            fund=fetch_fundamental_data_polygon(sym)
-            if fund and len(fund.get('revenue',[]))>=4:
-                price=100; w=config.week52_data.get(sym,{})
-                if w.get('high') and w.get('low'): price=(w['high']+w['low'])/2
-                eq=fund['shareholders_equity'][-1]; mcap=eq*2 if eq and eq>0 else 1e9
-                ratios={k:[] for k in ['pe_ratio','roe','net_profit_margin','debt_to_equity','fcfy']}
-                for j in range(len(fund['revenue'])):
-                    try:
-                        eps=fund['eps'][j]
-                        ratios['pe_ratio'].append(price/eps if eps>0 else None)
-                        eq_j=fund['shareholders_equity'][j]
-                        ratios['roe'].append(fund['net_income'][j]/eq_j if eq_j>0 else None)
-                        rev_j=fund['revenue'][j]
-                        ratios['net_profit_margin'].append(fund['net_income'][j]/rev_j if rev_j else None)
-                        ratios['debt_to_equity'].append(fund['total_debt'][j]/eq_j if eq_j>0 else None)
-                        if j>=3: ratios['fcfy'].append(sum(fund['fcf'][max(0,j-3):j+1])/mcap if mcap else None)
-                        else: ratios['fcfy'].append(None)
-                    except:
-                        for k in ratios: ratios[k].append(None)
-                slopes=calculate_all_slopes(fund,ratios)
-                config.fundamental_data[sym]=fund; config.fundamental_slopes[sym]=slopes; ok+=1
-            else: fail+=1
-        except: fail+=1
-        if (i+1)%25==0: print(f"   📈 {i+1}/{len(config.symbols)} (✓{ok} ✗{fail})")
-        time.sleep(0.15)
-    print(f"✅ Fundamentals: {ok} ok, {fail} failed\n")
-
-def calculate_stasis_merit_score(snap):
-    ms=0; st=snap.get('stasis',0)
-    for t,p in [(15,10),(12,9),(10,8),(8,7),(7,6),(6,5),(5,4),(4,3),(3,2),(2,1)]:
-        if st>=t: ms+=p; break
-    rr=snap.get('risk_reward')
-    if rr:
-        for t,p in [(3,5),(2.5,4),(2,3),(1.5,2),(1,1)]:
-            if rr>=t: ms+=p; break
-    ms+={'VERY_STRONG':4,'STRONG':3,'MODERATE':2,'WEAK':1}.get(snap.get('signal_strength',''),0)
-    dur=snap.get('duration_seconds',0)
-    if dur>=3600: ms+=3
-    elif dur>=1800: ms+=2
-    elif dur>=900: ms+=1
-    return ms
-
-def calculate_fundamental_merit_score(symbol, w52_pct):
+    stale=[]; missing=[]; loaded={}
+    for sym in config.symbols:
+        ent=disk_cache.get_json('fundamentals',sym) if disk_cache else None
+        if ent is None: missing.append(sym); continue
+        if disk_cache.is_stale('fundamentals',ent[2]): stale.append(sym)
+        fund=_load_fundamentals(sym)
+        if fund: loaded[sym]=fund
+    for sym,fund in rest.map("Fundamentals",missing,_load_fundamentals).items():
+        if fund is not None: loaded[sym]=fund
+    _store_fundamentals(loaded)
+    print(f"✅ Fundamentals: {len(loaded)} ok, {len(config.symbols)-len(loaded)} failed\n"); config.reference_version+=1
+    if stale:
+        print(f"🔄 Refreshing {len(stale)} stale fundamentals in background")
+        threading.Thread(target=refresh_fundamentals,args=(stale,),daemon=True).start()
+
+def refresh_fundamentals(symbols):
+    res=rest.map("Fundamentals refresh",symbols,lambda s: _load_fundamentals(s,refresh=True))
+    _store_fundamentals({s:f for s,f in res.items() if f is not None})
+    config.reference_version+=1
+
+SMS_STASIS=((2,3,4,5,6,7,8,10,12,15),(0,1,2,3,4,5,6,7,8,9,10))
+SMS_RR=((1,1.5,2,2.5,3),(0,1,2,3,4,5))
+SMS_DURATION=((900,1800,3600),(0,1,2,3))
+SMS_STRENGTH={'VERY_STRONG':4,'STRONG':3,'MODERATE':2,'WEAK':1}
+W52_POINTS=((5,15,25,35,45,55,65,75),(8,7,6,5,4,3,2,1,0))
+_SMS_TABLES=[(np.array(t,dtype=float),np.array(p)) for t,p in (SMS_STASIS,SMS_RR,SMS_DURATION)]
+
+def stasis_merit_scores(snaps):
+    n=len(snaps)
+    cols=(np.fromiter((d.get('stasis',0) for d in snaps),float,n),
+        np.fromiter((d.get('risk_reward') or 0.0 for d in snaps),float,n),
+        np.fromiter((d.get('duration_seconds',0) for d in snaps),float,n))
+    ms=np.fromiter((SMS_STRENGTH.get(d.get('signal_strength',''),0) for d in snaps),np.int64,n)
+    for (t,p),x in zip(_SMS_TABLES,cols): ms+=p[np.searchsorted(t,x,'right')]
+    return ms.tolist()
+
+def _w52_points(w52_pct):
+    return 0 if w52_pct is None else W52_POINTS[1][bisect.bisect_left(W52_POINTS[0],w52_pct)]
+
+def _fundamental_base(symbol):
     ms=0; sd={}; slopes=config.fundamental_slopes.get(symbol,{})
-    if not slopes:
-        if w52_pct is not None:
-            for t,p in [(5,8),(15,7),(25,6),(35,5),(45,4),(55,3),(65,2),(75,1)]:
-                if w52_pct<=t: ms+=p; break
-        return ms,sd
+    if not slopes: return ms,sd
     for lbl,key,tps in [('Rev_5','Rev_Slope_5',[(0.30,4),(0.20,3),(0.10,2),(0.05,1)]),
         ('FCF_5','FCF_Slope_5',[(0.40,4),(0.25,3),(0.10,2),(0.05,1)]),
         ('ROE_5','Return on Equity_Slope_5',[(0.20,2),(0.10,1)]),
@@ -480,9 +797,6 @@ def calculate_fundamental_merit_score(symbol, w52_pct):
         if v is not None:
             for t,p in tps:
                 if v<=t: ms+=p; break
-    if w52_pct is not None:
-        for t,p in [(5,8),(15,7),(25,6),(35,5),(45,4),(55,3),(65,2),(75,1)]:
-            if w52_pct<=t: ms+=p; break
     fcfy=slopes.get('FCFY'); sd['FCFY']=fcfy
     if fcfy is not None:
         if fcfy>=0.15: ms+=3
@@ -490,58 +804,149 @@ def calculate_fundamental_merit_score(symbol, w52_pct):
         elif fcfy>=0.05: ms+=1
     return ms,sd
 
+_fms_cache={}
+
+def fundamental_merit_score(symbol, w52_pct):
+    gen=config.reference_version; ent=_fms_cache.get(symbol)
+    if ent is None or ent[0]!=gen: ent=_fms_cache[symbol]=(gen,*_fundamental_base(symbol))
+    return ent[1]+_w52_points(w52_pct),ent[2]
+
+def _fetch_52w(sym):
+    end=datetime.now(); start=end-timedelta(days=365)
+    url=f"{config.polygon_rest_url}/v2/aggs/ticker/{sym}/range/1/day/{start.strftime('%Y-%m-%d')}/{end.strftime('%Y-%m-%d')}?adjusted=true&sort=asc&limit=365&apiKey={config.polygon_api_key}"
+    r=rest.get(url,timeout=15)
+    if r is None or r.status_code!=200: return None
+    res=r.json().get('results',[])
+    if not res: return None
+    hv=max(b['h'] for b in res); lv=min(b['l'] for b in res)
+    return {'high':hv,'low':lv,'range':hv-lv,'current':res[-1]['c']}
+
 def fetch_52_week_data():
-    print("📊 Fetching 52-week data..."); w52={}; end=datetime.now(); start=end-timedelta(days=365); ok=fail=0
-    for i,sym in enumerate(config.symbols):
-        try:
-            url=f"{config.polygon_rest_url}/v2/aggs/ticker/{sym}/range/1/day/{start.strftime('%Y-%m-%d')}/{end.strftime('%Y-%m-%d')}?adjusted=true&sort=asc&limit=365&apiKey={config.polygon_api_key}"
-            r=requests.get(url,timeout=15)
-            if r.status_code==200:
-                res=r.json().get('results',[])
-                if res: hv=max(b['h'] for b in res); lv=min(b['l'] for b in res); w52[sym]={'high':hv,'low':lv,'range':hv-lv,'current':res[-1]['c']}; ok+=1
-                else: w52[sym]={'high':None,'low':None,'range':None,'current':None}; fail+=1
-            else: w52[sym]={'high':None,'low':None,'range':None,'current':None}; fail+=1
-            if (i+1)%50==0: print(f"   52W: {i+1}/{len(config.symbols)} (✓{ok} ✗{fail})")
-            time.sleep(0.12)
-        except: w52[sym]={'high':None,'low':None,'range':None,'current':None}; fail+=1
+    print("📊 Fetching 52-week data..."); w52={}; ok=fail=0
+    for sym,d in rest.map("52W",config.symbols,_fetch_52w).items():
+        if d: w52[sym]=d; ok+=1
+        else: w52[sym]={'high':None,'low':None,'range':None,'current':None}; fail+=1
     print(f"✅ 52-week: {ok} ok, {fail} failed\n"); return w52
 
+def _fetch_volume(sym):
+    end=datetime.now(); start=end-timedelta(days=45)
+    url=f"{config.polygon_rest_url}/v2/aggs/ticker/{sym}/range/1/day/{start.strftime('%Y-%m-%d')}/{end.strftime('%Y-%m-%d')}?adjusted=true&sort=desc&limit=30&apiKey={config.polygon_api_key}"
+    r=rest.get(url,timeout=10)
+    if r is None or r.status_code!=200: return None
+    res=r.json().get('results',[])
+    return (sum(b['v'] for b in res)/len(res))/1e6 if res else None
+
 def fetch_volume_data():
-    print("📊 Fetching volume data..."); vols={}; end=datetime.now(); start=end-timedelta(days=45)
-    for i,sym in enumerate(config.symbols):
-        try:
-            url=f"{config.polygon_rest_url}/v2/aggs/ticker/{sym}/range/1/day/{start.strftime('%Y-%m-%d')}/{end.strftime('%Y-%m-%d')}?adjusted=true&sort=desc&limit=30&apiKey={config.polygon_api_key}"
-            r=requests.get(url,timeout=10)
-            if r.status_code==200:
-                res=r.json().get('results',[])
-                if res: vols[sym]=(sum(b['v'] for b in res)/len(res))/1e6
-                else: vols[sym]=10.0
-            else: vols[sym]=10.0
-            if (i+1)%50==0: print(f"   Vol: {i+1}/{len(config.symbols)}")
-            time.sleep(0.12)
-        except: vols[sym]=10.0
+    print("📊 Fetching volume data...")
+    vols={sym:(v if v is not None else 10.0) for sym,v in rest.map("Vol",config.symbols,_fetch_volume).items()}
     print("✅ Volume loaded\n"); return vols
 
-def fetch_historical_bars(sym, days=5):
-    bars=[]; end=datetime.now(); start=end-timedelta(days=days)
+def _fetch_grouped_day(day):
+    url=f"{config.polygon_rest_url}/v2/aggs/grouped/locale/us/market/stocks/{day.strftime('%Y-%m-%d')}?adjusted=true&apiKey={config.polygon_api_key}"
+    r=rest.get(url,timeout=30)
+    if r is None or r.status_code!=200: return None
+    return r.json().get('results') or []
+
+class GroupedDaily:
+    def __init__(self, symbols=None):
+        self.symbols=list(symbols or config.symbols); self.index={s:i for i,s in enumerate(self.symbols)}
+        n=len(self.symbols); self.dates=np.array([],dtype='datetime64[D]')
+        self.high=np.empty((0,n)); self.low=np.empty((0,n)); self.close=np.empty((0,n)); self.volume=np.empty((0,n))
+        self.lock=threading.Lock()
+    def _fetch_day(self, day):
+        key=day.isoformat(); ent=disk_cache.get_json('daily',key) if disk_cache else None
+        if ent and (day<datetime.now().date() and ent[1]=='final' or not disk_cache.is_stale('daily',ent[2])): return ent[0]
+        res=_fetch_grouped_day(day)
+        if res is not None and disk_cache:
+            rows=[b for b in res if b.get('T') in self.index]
+            disk_cache.put_json('daily',key,rows,'final' if day<datetime.now().date() else None); return rows
+        return res
+    def _fetch(self, days):
+        got=rest.map("Daily",[d for d in days if d.weekday()<5],self._fetch_day)
+        days=sorted(d for d,res in got.items() if res); n=len(self.symbols)
+        H,L,C,V=(np.full((len(days),n),np.nan) for _ in range(4))
+        for k,d in enumerate(days):
+            for b in got[d]:
+                i=self.index.get(b.get('T'))
+                if i is None: continue
+                H[k,i]=b.get('h',np.nan); L[k,i]=b.get('l',np.nan); C[k,i]=b.get('c',np.nan); V[k,i]=b.get('v',np.nan)
+        return np.array(days,dtype='datetime64[D]'),H,L,C,V
+    def load(self, days=365):
+        end=datetime.now().date(); dates,H,L,C,V=self._fetch([end-timedelta(days=k) for k in range(days,-1,-1)])
+        with self.lock: self.dates,self.high,self.low,self.close,self.volume=dates,H,L,C,V
+        print(f"✅ Daily: {len(dates)} sessions x {len(self.symbols)} symbols\n")
+    def refresh(self, days=365):
+        end=datetime.now().date(); last=self.dates[-1].astype(object) if len(self.dates) else end-timedelta(days=days+1)
+        dates,H,L,C,V=self._fetch([last+timedelta(days=k) for k in range(1,(end-last).days+1)])
+        if not len(dates): return False
+        with self.lock:
+            m=np.concatenate([self.dates,dates])>=np.datetime64(end-timedelta(days=days),'D')
+            self.dates=np.concatenate([self.dates,dates])[m]
+            self.high,self.low,self.close,self.volume=(np.concatenate([a,b])[m] for a,b in
+                ((self.high,H),(self.low,L),(self.close,C),(self.volume,V)))
+        return True
+    def _window(self, days):
+        return self.dates>=np.datetime64(datetime.now().date()-timedelta(days=days),'D')
+    def week52(self, days=365):
+        with self.lock: m=self._window(days); H,L,C=self.high[m],self.low[m],self.close[m]
+        valid=~np.isnan(C)
+        hv=np.max(np.where(np.isnan(H),-np.inf,H),0,initial=-np.inf)
+        lv=np.min(np.where(np.isnan(L),np.inf,L),0,initial=np.inf)
+        last=len(C)-1-np.argmax(valid[::-1],0) if len(C) else np.zeros(len(self.symbols),dtype=np.intp)
+        ok=valid.any(0)&np.isfinite(hv)&np.isfinite(lv); out={}
+        for i,s in enumerate(self.symbols):
+            if ok[i]: out[s]={'high':float(hv[i]),'low':float(lv[i]),'range':float(hv[i]-lv[i]),'current':float(C[last[i],i])}
+            else: out[s]={'high':None,'low':None,'range':None,'current':None}
+        return out
+    def volumes(self, days=45, bars=30):
+        with self.lock: V=self.volume[self._window(days)]
+        valid=~np.isnan(V); use=valid&(np.cumsum(valid[::-1],0)[::-1]<=bars)
+        cnt=use.sum(0); tot=np.where(use,V,0.0).sum(0)
+        return {s:(float(tot[i]/cnt[i])/1e6 if cnt[i] else 10.0) for i,s in enumerate(self.symbols)}
+    def run_refresh(self):
+        while True:
+            time.sleep(config.daily_refresh_interval)
+            try:
+                if self.refresh(): config.week52_data=self.week52(); config.volumes=self.volumes(); recompute_fundamental_slopes()
+            except Exception as e: print(f"Daily refresh err: {e}")
+
+daily_bars = GroupedDaily()
+
+def fetch_historical_arrays(sym, days=5, since=None):
+    end=datetime.now(); start=end-timedelta(days=days)
     try:
-        url=f"{config.polygon_rest_url}/v2/aggs/ticker/{sym}/range/1/minute/{start.strftime('%Y-%m-%d')}/{end.strftime('%Y-%m-%d')}?adjusted=true&sort=asc&limit=50000&apiKey={config.polygon_api_key}"
-        r=requests.get(url,timeout=30)
-        if r.status_code==200:
-            res=r.json().get('results',[])
-            bars=[{'timestamp':datetime.fromtimestamp(b['t']/1000),'close':b['c']} for b in res]
-    except: pass
-    return bars
+        frm=start.strftime('%Y-%m-%d') if since is None else str(since+1); t=c=None
+        if disk_cache:
+            ent=disk_cache.get_bars(sym); cut=datetime(start.year,start.month,start.day).timestamp()*1000
+            if ent is not None:
+                m=ent[0]>=cut; t,c=ent[0][m],ent[1][m]
+                if len(t): frm=str(int(t[-1])+1)
+                if len(t) and not disk_cache.is_stale('minute',ent[2]): frm=None
+        if frm:
+            url=f"{config.polygon_rest_url}/v2/aggs/ticker/{sym}/range/1/minute/{frm}/{end.strftime('%Y-%m-%d')}?adjusted=true&sort=asc&limit=50000&apiKey={config.polygon_api_key}"
+            r=rest.get(url,timeout=30)
+            if r is not None and r.status_code==200:
+                res=r.json().get('results',[])
+                nt=np.array([b['t'] for b in res],dtype=np.int64); nc=np.array([b['c'] for b in res],dtype=np.float64)
+                t,c=(nt,nc) if t is None else (np.concatenate([t,nt]),np.concatenate([c,nc]))
+                if disk_cache: disk_cache.put_bars(sym,t,c)
+        if t is not None and since is not None: m=t>since; t,c=t[m],c[m]
+        return (t,c) if t is not None and len(t) else None
+    except: return None
 
 class Bitstream:
+    __slots__=('symbol','threshold','initial_price','volume','is_etf','reference_price','current_live_price',
+        'last_price_update','band_width','upper_band','lower_band','bits','current_stasis','last_bit',
+        'direction','signal_strength','stasis_info','total_bits','_lock','_run','_run_start','_run_price','_run_time','version')
     def __init__(self, symbol, threshold, initial_price, volume):
         self.symbol=symbol; self.threshold=threshold; self.initial_price=initial_price
         self.volume=volume; self.is_etf=symbol in config.etf_symbols
         self.reference_price=initial_price; self.current_live_price=initial_price
         self.last_price_update=datetime.now(); self._update_bands()
-        self.bits: deque=deque(maxlen=500); self.current_stasis=0; self.last_bit=None
+        self.bits=BitHistory(HIST_LEN); self.current_stasis=0; self.last_bit=None
         self.direction=None; self.signal_strength=None; self.stasis_info=None
         self.total_bits=0; self._lock=threading.Lock()
+        self._run=0; self._run_start=0; self._run_price=None; self._run_time=None; self.version=0
     def _update_bands(self):
         self.band_width=self.threshold*self.reference_price
         self.upper_band=self.reference_price+self.band_width
@@ -553,61 +958,258 @@ class Bitstream:
             if self.band_width<=0: return
             x=int((price-self.reference_price)/self.band_width)
             if x>0:
-                for _ in range(x): self.bits.append(BitEntry(1,price,timestamp)); self.total_bits+=1
+                ns=_to_ns(timestamp)
+                for _ in range(x): self._push_bit(1,price,timestamp,ns)
                 self.reference_price=price; self._update_bands()
             elif x<0:
-                for _ in range(abs(x)): self.bits.append(BitEntry(0,price,timestamp)); self.total_bits+=1
+                ns=_to_ns(timestamp)
+                for _ in range(abs(x)): self._push_bit(0,price,timestamp,ns)
                 self.reference_price=price; self._update_bands()
+            if x: self.version+=1
             self._update_stasis(timestamp)
+    def _push_bit(self, bit, price, ts, ns):
+        last=self.bits.last; alt=last is not None and last!=bit
+        self.bits.append(bit,price,ns); self.total_bits+=1
+        if not alt: self._run=1; self._run_start=self.total_bits-1; self._run_price=price; self._run_time=ts
+        elif self._run<len(self.bits): self._run+=1
+        else:
+            first=self.bits[0]; self._run_start=self.total_bits-len(self.bits)
+            self._run_price=first.price; self._run_time=first.timestamp
     def _update_stasis(self, ts):
         if len(self.bits)<2:
-            self.current_stasis=len(self.bits); self.last_bit=self.bits[-1].bit if self.bits else None
+            self.current_stasis=len(self.bits); self.last_bit=self.bits.last
             self.direction=None; self.signal_strength=None; return
-        bl=list(self.bits); sc=1; si=len(bl)-1
-        for i in range(len(bl)-1,0,-1):
-            if bl[i].bit!=bl[i-1].bit: sc+=1; si=i-1
-            else: break
-        prev=self.current_stasis; self.current_stasis=sc; self.last_bit=bl[-1].bit
-        if prev<2 and sc>=2 and 0<=si<len(bl): self.stasis_info=StasisInfo(bl[si].timestamp,bl[si].price,sc)
+        sc=self._run; prev=self.current_stasis; self.current_stasis=sc; self.last_bit=self.bits.last
+        if prev<2 and sc>=2: self.stasis_info=StasisInfo(self._run_time,self._run_price,sc)
         elif sc>=2 and self.stasis_info and sc>self.stasis_info.peak_stasis: self.stasis_info.peak_stasis=sc
         elif prev>=2 and sc<2: self.stasis_info=None
         if sc>=2:
             self.direction=Direction.LONG if self.last_bit==0 else Direction.SHORT
-            if sc>=10: self.signal_strength=SignalStrength.VERY_STRONG
-            elif sc>=7: self.signal_strength=SignalStrength.STRONG
-            elif sc>=5: self.signal_strength=SignalStrength.MODERATE
-            elif sc>=3: self.signal_strength=SignalStrength.WEAK
-            else: self.signal_strength=None
+            self.signal_strength=_signal_strength(sc)
         else: self.direction=None; self.signal_strength=None
+    def get_state(self):
+        si=self.stasis_info
+        return (self.initial_price,self.volume,self.reference_price,self.current_live_price,_to_ns(self.last_price_update),
+            self.current_stasis,self.total_bits,self._run,self._run_start,
+            np.nan if self._run_price is None else self._run_price,0 if self._run_time is None else _to_ns(self._run_time),
+            _to_ns(si.start_time) if si else 0,si.start_price if si else np.nan,si.peak_stasis if si else 0)
+    @classmethod
+    def from_state(cls, symbol, threshold, st, bits, prices, ns):
+        (ip,vol,ref,live,upd,sc,tot,run,run_start,run_price,run_time,si_ns,si_price,si_peak)=st
+        b=cls(symbol,threshold,float(ip),float(vol)); b.reference_price=float(ref); b._update_bands()
+        b.current_live_price=float(live); b.last_price_update=_from_ns(upd)
+        b.bits=BitHistory.from_arrays(bits,prices,ns); b.current_stasis=int(sc); b.total_bits=int(tot)
+        b._run=int(run); b._run_start=int(run_start)
+        b._run_price=None if np.isnan(run_price) else float(run_price); b._run_time=_from_ns(run_time) if run_time else None
+        b.stasis_info=StasisInfo(_from_ns(si_ns),float(si_price),int(si_peak)) if si_peak else None
+        b.last_bit=b.bits.last
+        if b.current_stasis>=2:
+            b.direction=Direction.LONG if b.last_bit==0 else Direction.SHORT; b.signal_strength=_signal_strength(b.current_stasis)
+        return b
     def get_snapshot(self, live_price=None):
         with self._lock:
             p=live_price if live_price is not None else self.current_live_price
-            si=self.stasis_info; tp=sl=rr=None
-            dtp=dsl=spc=None
-            if si is not None: spc=si.get_price_change_pct(p)
-            if self.direction and self.current_stasis>=2:
-                if self.direction==Direction.LONG: tp,sl=self.upper_band,self.lower_band; rw,rk=tp-p,p-sl
-                else: tp,sl=self.lower_band,self.upper_band; rw,rk=p-tp,sl-p
-                if rk>0 and rw>0: rr=rw/rk
-                elif rk>0: rr=0.0
-                if p>0: dtp=(abs(tp-p)/p)*100; dsl=(abs(sl-p)/p)*100
-            return {'symbol':self.symbol,'is_etf':self.is_etf,'threshold':self.threshold,
-                'threshold_pct':self.threshold*100,'stasis':self.current_stasis,'total_bits':self.total_bits,
-                'current_price':p,'anchor_price':si.start_price if si else None,
-                'direction':self.direction.value if self.direction else None,
-                'signal_strength':self.signal_strength.value if self.signal_strength else None,
-                'is_tradable':(self.current_stasis>=config.min_tradable_stasis and self.direction is not None and self.volume>1.0),
-                'stasis_start_str':si.get_start_date_str() if si else "—",
-                'stasis_duration_str':si.get_duration_str() if si else "—",
-                'duration_seconds':si.get_duration().total_seconds() if si else 0,
-                'stasis_price_change_pct':spc,'take_profit':tp,'stop_loss':sl,'risk_reward':rr,
-                'distance_to_tp_pct':dtp,'distance_to_sl_pct':dsl,
-                'week52_percentile':calculate_52week_percentile(p,self.symbol),'volume':self.volume}
+            return _stream_snapshot(self.symbol,self.is_etf,self.threshold,self.current_stasis,self.total_bits,p,
+                self.direction,self.signal_strength,self.upper_band,self.lower_band,self.stasis_info,self.volume)
+
+STREAM_STATE=(('initial_price','f8'),('volume','f8'),('reference_price','f8'),('live_price','f8'),('last_update_ns','i8'),
+    ('stasis','i4'),('total_bits','i8'),('run','i4'),('run_start','i8'),('run_price','f8'),('run_ns','i8'),
+    ('start_ns','i8'),('start_price','f8'),('peak_stasis','i4'))
+
+def _stream_snapshot(symbol, is_etf, threshold, stasis, total_bits, p, direction, strength, upper, lower, si, volume):
+    tp=sl=rr=None; dtp=dsl=spc=None
+    if si is not None: spc=si.get_price_change_pct(p)
+    if direction and stasis>=2:
+        if direction==Direction.LONG: tp,sl=upper,lower; rw,rk=tp-p,p-sl
+        else: tp,sl=lower,upper; rw,rk=p-tp,sl-p
+        if rk>0 and rw>0: rr=rw/rk
+        elif rk>0: rr=0.0
+        if p>0: dtp=(abs(tp-p)/p)*100; dsl=(abs(sl-p)/p)*100
+    return {'symbol':symbol,'is_etf':is_etf,'threshold':threshold,
+        'threshold_pct':threshold*100,'stasis':stasis,'total_bits':total_bits,
+        'current_price':p,'anchor_price':si.start_price if si else None,
+        'direction':direction.value if direction else None,
+        'signal_strength':strength.value if strength else None,
+        'is_tradable':(stasis>=config.min_tradable_stasis and direction is not None and volume>1.0),
+        'stasis_start_str':si.get_start_date_str() if si else "—",
+        'stasis_duration_str':si.get_duration_str() if si else "—",
+        'duration_seconds':si.get_duration().total_seconds() if si else 0,
+        'stasis_price_change_pct':spc,'take_profit':tp,'stop_loss':sl,'risk_reward':rr,
+        'distance_to_tp_pct':dtp,'distance_to_sl_pct':dsl,
+        'week52_percentile':calculate_52week_percentile(p,symbol),'volume':volume}
+
+_NO_HISTORY=(np.zeros(0,dtype=np.int8),np.zeros(0),np.zeros(0,dtype=np.int64))
+
+def _history_from_log(log, m, maxlen=HIST_LEN):
+    if not log: return {}
+    rows,cols,n,bit,price,ns=(np.concatenate(x) for x in zip(*log))
+    cell=rows.astype(np.int64)*m+cols; o=np.argsort(cell,kind='stable')
+    cell,n,bit,price,ns=cell[o],n[o],bit[o],price[o],ns[o]
+    starts=np.flatnonzero(np.r_[True,cell[1:]!=cell[:-1]]); ends=np.r_[starts[1:],len(cell)]
+    cs=np.cumsum(n); after=np.repeat(cs[ends-1],ends-starts)-cs
+    take=np.where(after<maxlen,np.minimum(n,maxlen-after),0); rep=np.repeat(np.arange(len(n)),take)
+    bit,price,ns=bit[rep],price[rep],ns[rep]; bnd=np.concatenate([[0],np.cumsum(np.add.reduceat(take,starts))])
+    return {int(c):(bit[a:b],price[a:b],ns[a:b]) for c,a,b in zip(cell[starts].tolist(),bnd[:-1].tolist(),bnd[1:].tolist())}
+
+class BitstreamEngine:
+    def __init__(self, symbols, thresholds, volumes=None):
+        self.symbols=list(symbols); self.thresholds=np.asarray(thresholds,dtype=np.float64)
+        self.index={s:i for i,s in enumerate(self.symbols)}; volumes=volumes or {}
+        n,m=len(self.symbols),len(self.thresholds); self.shape=(n,m)
+        self.active=np.zeros(n,dtype=bool)
+        self.volume=np.array([volumes.get(s,10.0) for s in self.symbols],dtype=np.float64)
+        self.is_etf=np.array([s in config.etf_symbols for s in self.symbols],dtype=bool)
+        self.live_price=np.full(n,np.nan); self.last_update_ns=np.zeros(n,dtype=np.int64)
+        self.reference_price=np.zeros((n,m)); self.band_width=np.zeros((n,m))
+        self.upper_band=np.zeros((n,m)); self.lower_band=np.zeros((n,m))
+        self.last_bit=np.full((n,m),-1,dtype=np.int8); self.last_bit_price=np.full((n,m),np.nan)
+        self.last_bit_ns=np.zeros((n,m),dtype=np.int64)
+        self.stasis=np.zeros((n,m),dtype=np.int32); self.total_bits=np.zeros((n,m),dtype=np.int64)
+        self.start_price=np.full((n,m),np.nan); self.start_ns=np.zeros((n,m),dtype=np.int64)
+        self.peak_stasis=np.zeros((n,m),dtype=np.int32)
+        self.initial_price=np.full(n,np.nan); self._log=None
+        self.version=np.zeros((n,m),dtype=np.int64)
+    def _set_reference(self, rows, cols, price):
+        self.reference_price[rows,cols]=price
+        bw=self.thresholds[cols]*price; self.band_width[rows,cols]=bw
+        self.upper_band[rows,cols]=price+bw; self.lower_band[rows,cols]=price-bw
+    def activate(self, symbol, initial_price, volume=None, ts=None):
+        i=self.index[symbol]; cols=np.arange(self.shape[1])
+        self.active[i]=True; self.live_price[i]=initial_price; self.initial_price[i]=initial_price
+        self.last_update_ns[i]=_to_ns(ts or datetime.now())
+        if volume is not None: self.volume[i]=volume
+        self._set_reference(i,cols,initial_price)
+    SYMBOL_STATE=('active','volume','live_price','last_update_ns')
+    CELL_STATE=('reference_price','band_width','upper_band','lower_band','last_bit','last_bit_price','last_bit_ns',
+        'stasis','total_bits','start_price','start_ns','peak_stasis')
+    @classmethod
+    def from_streams(cls, streams, symbols=None, thresholds=None):
+        symbols=symbols or list(dict.fromkeys(k[0] for k in streams)); thresholds=thresholds or config.thresholds
+        eng=cls(symbols,thresholds); eng.load_streams(streams); return eng
+    def load_streams(self, streams):
+        eng=self; col={th:j for j,th in enumerate(self.thresholds)}
+        for (sym,th),b in streams.items():
+            if sym not in eng.index or th not in col: continue
+            i,j=eng.index[sym],col[th]
+            eng.active[i]=True; eng.volume[i]=b.volume; eng.live_price[i]=b.current_live_price; eng.initial_price[i]=b.initial_price
+            eng.last_update_ns[i]=max(eng.last_update_ns[i],_to_ns(b.last_price_update))
+            eng.reference_price[i,j]=b.reference_price; eng.band_width[i,j]=b.band_width
+            eng.upper_band[i,j]=b.upper_band; eng.lower_band[i,j]=b.lower_band
+            eng.stasis[i,j]=b.current_stasis; eng.total_bits[i,j]=b.total_bits
+            if b.bits:
+                bits,px,ns=b.bits.arrays(); eng.last_bit[i,j]=bits[-1]
+                eng.last_bit_price[i,j]=px[-1]; eng.last_bit_ns[i,j]=ns[-1]
+            if b.stasis_info is not None:
+                eng.start_price[i,j]=b.stasis_info.start_price; eng.start_ns[i,j]=_to_ns(b.stasis_info.start_time)
+                eng.peak_stasis[i,j]=b.stasis_info.peak_stasis
+    def state(self):
+        return {k:getattr(self,k) for k in self.SYMBOL_STATE+self.CELL_STATE}
+    def load_state(self, symbols, arrays):
+        rows=[(i,self.index[s]) for i,s in enumerate(symbols) if s in self.index]
+        if not rows: return 0
+        src,dst=(np.array(x,dtype=np.intp) for x in zip(*rows))
+        for k in self.SYMBOL_STATE+self.CELL_STATE: getattr(self,k)[dst]=arrays[k][src]
+        return len(rows)
+    def process(self, idx, prices, timestamp):
+        idx=np.asarray(idx,dtype=np.intp); prices=np.asarray(prices,dtype=np.float64)
+        keep=self.active[idx]; idx,prices=idx[keep],prices[keep]
+        if not len(idx): return 0
+        ns=_to_ns(timestamp) if isinstance(timestamp,datetime) else np.asarray(timestamp,dtype=np.int64)[keep]
+        self.live_price[idx]=prices; self.last_update_ns[idx]=ns
+        P=prices[:,None]; bw=self.band_width[idx]
+        cross=~((self.lower_band[idx]<P)&(P<self.upper_band[idx]))&(bw>0)
+        if not cross.any(): return 0
+        with np.errstate(divide='ignore',invalid='ignore'):
+            x=np.where(cross,np.trunc((P-self.reference_price[idx])/np.where(cross,bw,1.0)),0).astype(np.int64)
+        r,c=np.nonzero(x)
+        if not len(r): return 0
+        rows=idx[r]; k=x[r,c]; n=np.abs(k); bit=(k>0).astype(np.int8); p=prices[r]
+        prev=self.stasis[rows,c]; lb=self.last_bit[rows,c]
+        alt=(n==1)&(lb>=0)&(lb!=bit)
+        sc=np.where(alt,np.minimum(prev+1,HIST_LEN),1).astype(np.int32)
+        new=(prev<2)&(sc>=2)
+        if new.any():
+            self.start_price[rows[new],c[new]]=self.last_bit_price[rows[new],c[new]]
+            self.start_ns[rows[new],c[new]]=self.last_bit_ns[rows[new],c[new]]
+        self.peak_stasis[rows,c]=np.where(sc>=2,np.maximum(self.peak_stasis[rows,c],sc),0)
+        end=sc<2
+        if end.any(): self.start_price[rows[end],c[end]]=np.nan; self.start_ns[rows[end],c[end]]=0
+        self.stasis[rows,c]=sc; self.total_bits[rows,c]+=n
+        nsr=np.full(len(r),ns,dtype=np.int64) if np.ndim(ns)==0 else ns[r]
+        self.last_bit[rows,c]=bit; self.last_bit_price[rows,c]=p; self.last_bit_ns[rows,c]=nsr
+        self._set_reference(rows,c,p); self.version[rows,c]+=1
+        if self._log is not None: self._log.append((rows,c,n,bit,p,nsr))
+        return int(n.sum())
+    def replay(self, series, record=False):
+        syms=[s for s,(px,_) in series.items() if s in self.index and len(px)]
+        if not syms: return [] if record else None
+        lens=np.array([len(series[s][0]) for s in syms]); order=np.argsort(-lens,kind='stable')
+        syms=[syms[k] for k in order]; lens=lens[order]; rows=np.array([self.index[s] for s in syms],dtype=np.intp)
+        px=np.concatenate([np.asarray(series[s][0],dtype=np.float64) for s in syms])
+        ns=np.concatenate([np.asarray(series[s][1],dtype=np.int64) for s in syms])
+        off=np.concatenate([[0],np.cumsum(lens)[:-1]])
+        for s,o in zip(syms,off.tolist()): self.activate(s,float(px[o]))
+        self._log=[] if record else None
+        try:
+            for k in range(int(lens[0])):
+                cnt=int(np.searchsorted(-lens,-k,side='left')); sel=off[:cnt]+k
+                self.process(rows[:cnt],px[sel],ns[sel])
+            return self._log
+        finally: self._log=None
+    def to_streams(self, log):
+        m=self.shape[1]; hist=_history_from_log(log,m); out={}
+        for i in np.flatnonzero(self.active).tolist():
+            sym=self.symbols[i]
+            for j,th in enumerate(self.thresholds.tolist()):
+                hb,hp,hn=hist.get(i*m+j,_NO_HISTORY); sc=int(self.stasis[i,j]); tot=int(self.total_bits[i,j]); L=len(hb)
+                rp,rn=(hp[L-sc],hn[L-sc]) if sc else (np.nan,0); peak=int(self.peak_stasis[i,j])
+                st=(self.initial_price[i],self.volume[i],self.reference_price[i,j],self.live_price[i],self.last_update_ns[i],
+                    sc,tot,sc,tot-sc,rp,rn,self.start_ns[i,j] if peak else 0,self.start_price[i,j],peak)
+                out[(sym,th)]=Bitstream.from_state(sym,th,st,hb,hp,hn)
+        return out
+    def process_prices(self, prices, timestamp):
+        idx=[];px=[]
+        for s,p in prices.items():
+            i=self.index.get(s)
+            if i is not None: idx.append(i); px.append(p)
+        return self.process(idx,px,timestamp)
+    def process_ticks(self, ticks):
+        seqs=[(self.index[s],[(p,_to_ns(_tick_time(ms))) for ms,p in evs]) for s,evs in ticks.items() if s in self.index]
+        bits=0
+        for k in range(max((len(v) for _,v in seqs),default=0)):
+            rows=[(i,v[k]) for i,v in seqs if len(v)>k]
+            bits+=self.process([i for i,_ in rows],[e[0] for _,e in rows],[e[1] for _,e in rows])
+        return bits
+    def get_snapshot(self, i, j, live_price=None):
+        sym=self.symbols[i]; sc=int(self.stasis[i,j])
+        p=live_price if live_price is not None else float(self.live_price[i])
+        d=s=si=None
+        if sc>=2:
+            d=Direction.LONG if self.last_bit[i,j]==0 else Direction.SHORT; s=_signal_strength(sc)
+            si=StasisInfo(_from_ns(self.start_ns[i,j]),float(self.start_price[i,j]),int(self.peak_stasis[i,j]))
+        return _stream_snapshot(sym,bool(self.is_etf[i]),float(self.thresholds[j]),sc,int(self.total_bits[i,j]),p,
+            d,s,float(self.upper_band[i,j]),float(self.lower_band[i,j]),si,float(self.volume[i]))
+    def snapshots(self, prices=None, thresholds=None):
+        prices=prices or {}
+        cols=range(self.shape[1]) if thresholds is None else [j for j,th in enumerate(self.thresholds) if th in thresholds]
+        return [self.get_snapshot(i,j,prices.get(self.symbols[i])) for i in np.flatnonzero(self.active) for j in cols]
+    def count_tradable(self):
+        return int(((self.stasis>=config.min_tradable_stasis)&(self.volume>1.0)[:,None]&self.active[:,None]).sum())
+
+def replay_bars(symbol, closes, ts_ms, thresholds=None, volume=None):
+    vol=config.volumes.get(symbol,10.0) if volume is None else volume
+    eng=BitstreamEngine([symbol],thresholds or config.thresholds,{symbol:vol})
+    return eng.to_streams(eng.replay({symbol:(closes,_ms_to_ns(ts_ms))},record=True))
+
+_PRICE_EVENTS=frozenset(('A','AM','T','Q'))
 
 class PolygonPriceFeed:
     def __init__(self):
-        self.lock=threading.Lock(); self.current_prices={s:None for s in config.symbols}
-        self.is_running=False; self.ws=None; self.message_count=0
+        self.lock=threading.Lock(); self.symbols=list(config.symbols); self.index={s:i for i,s in enumerate(self.symbols)}
+        self.last=[None]*len(self.symbols); self.is_running=False; self.ws=None; self.message_count=0; self.frame_count=0
+        self.dirty=set(); self.changed=threading.Condition(self.lock)
+        self.ticks=[deque(maxlen=config.tick_buffer) for _ in self.symbols]; self.ticks_dropped=0
+        self._rate=(time.time(),0); self._rate_value=0.0
     def start(self):
         self.is_running=True; threading.Thread(target=self._loop,daemon=True).start(); print("✅ WebSocket starting...")
     def _loop(self):
@@ -617,19 +1219,47 @@ class PolygonPriceFeed:
     def _connect(self):
         def on_msg(ws,msg):
             try:
-                data=json.loads(msg)
-                for m in (data if isinstance(data,list) else [data]): self._proc(m)
-            except: pass
+                if recorder: recorder.frame(msg)
+                self._frame(msg)
+            except Exception as e: print(f"WS msg err: {e!r}")
         def on_open(ws): print("✅ WS connected"); ws.send(json.dumps({"action":"auth","params":config.polygon_api_key}))
         self.ws=websocket.WebSocketApp(config.polygon_ws_url,on_open=on_open,on_message=on_msg)
         self.ws.run_forever(sslopt={"cert_reqs":ssl.CERT_NONE})
-    def _proc(self,msg):
-        if msg.get('ev')=='status' and msg.get('status')=='auth_success': self._sub()
-        elif msg.get('ev') in ('A','AM','T','Q'):
-            sym=msg.get('sym','') or msg.get('S','')
-            price=msg.get('c') or msg.get('vw') or msg.get('p') or msg.get('bp')
-            if price and sym in self.current_prices:
-                with self.lock: self.current_prices[sym]=float(price); self.message_count+=1
+    def _frame(self, msg):
+        try: data=_json_loads(msg)
+        except ValueError as e: print(f"WS decode err: {e}"); return
+        idx=self.index; rows=[]
+        for m in (data if isinstance(data,list) else (data,)):
+            ev=m.get('ev')
+            if ev in _PRICE_EVENTS:
+                i=idx.get(m.get('sym') or m.get('S'))
+                p=m.get('c') or m.get('vw') or m.get('p') or m.get('bp')
+                # aggregates (A/AM) carry window start 's' and end 'e' ms; the close is as of 'e'.
+                # On trades/quotes 's' is the size, so their SIP timestamp is 't'.
+                ts=m.get('e') or m.get('s') if ev in ('A','AM') else m.get('t')
+                if i is not None and p: rows.append((i,float(p),ts))
+            elif ev=='status': self._status(m)
+        if rows: self._apply(rows)
+    def _status(self, m):
+        st=m.get('status')
+        if st=='auth_success': self._sub()
+        elif st in ('auth_failed','error'): print(f"WS {st}: {m.get('message')}")
+    def _apply(self, rows):
+        last=self.last; dirty=self.dirty; tick=config.tick_mode
+        ts=max((t for _,_,t in rows if t),default=None)
+        if ts: metrics.observe('stasis_feed_lag_seconds',max(0.0,time.time()-ts/1000))
+        with metrics.locked(self.lock,'feed'):
+            n=len(dirty); self.message_count+=len(rows); self.frame_count+=1
+            if tick:
+                now=time.time()*1000
+                for i,p,t in rows:
+                    q=self.ticks[i]
+                    if len(q)==q.maxlen: self.ticks_dropped+=1
+                    q.append((t or now,p)); last[i]=p; dirty.add(i)
+            else:
+                for i,p,t in rows:
+                    if last[i]!=p: last[i]=p; dirty.add(i)
+            if len(dirty)!=n or tick: self.changed.notify()
     def _sub(self):
         for i in range(0,len(config.symbols),50):
             batch=config.symbols[i:i+50]
@@ -637,70 +1267,527 @@ class PolygonPriceFeed:
             time.sleep(0.1)
         print(f"📡 Subscribed {len(config.symbols)} symbols")
     def get_prices(self):
-        with self.lock: return {k:v for k,v in self.current_prices.items() if v}
+        with self.lock: return {s:v for s,v in zip(self.symbols,self.last) if v}
+    def pop_changed(self, timeout=None):
+        with self.changed:
+            if not self.dirty: self.changed.wait(timeout)
+            out={self.symbols[i]:self.last[i] for i in self.dirty}; self.dirty.clear(); return out
+    def pop_ticks(self, timeout=None):
+        with self.changed:
+            if not self.dirty: self.changed.wait(timeout)
+            out={}
+            for i in self.dirty: q=self.ticks[i]; out[self.symbols[i]]=list(q); q.clear()
+            self.dirty.clear(); return out
     def get_status(self):
-        with self.lock: return {'connected':sum(1 for v in self.current_prices.values() if v),'total':len(config.symbols),'messages':self.message_count}
+        with self.lock: return {'connected':sum(1 for v in self.last if v),'total':len(self.symbols),'messages':self.message_count}
+    def rate(self):
+        now=time.time(); n=self.message_count; t0,n0=self._rate
+        if now-t0>=1.0: self._rate=(now,n); self._rate_value=(n-n0)/(now-t0)
+        return self._rate_value
 
 price_feed = PolygonPriceFeed()
 
+def _write_checkpoint(path, arrays, meta):
+    tmp=path+".tmp"; old=path+".old"
+    for d in (tmp,old):
+        if os.path.isdir(d):
+            for f in os.listdir(d): os.remove(os.path.join(d,f))
+            os.rmdir(d)
+    os.makedirs(tmp)
+    for k,a in arrays.items(): np.save(os.path.join(tmp,k+".npy"),np.ascontiguousarray(a))
+    with open(os.path.join(tmp,"meta.json"),"w") as f: json.dump(meta,f)
+    if os.path.isdir(path): os.rename(path,old)
+    os.rename(tmp,path)
+
+def _read_checkpoint(path):
+    try:
+        with open(os.path.join(path,"meta.json")) as f: meta=json.load(f)
+        arrays={f[:-4]:np.load(os.path.join(path,f),mmap_mode='r') for f in os.listdir(path) if f.endswith(".npy")}
+        return meta,arrays
+    except (OSError,ValueError): return None
+
+AM_MODES=('all','tradable'); AM_DIRS=('ALL','LONG','SHORT'); AM_SORTS=('tms','fms','stasis','52w')
+AM_TABLE_ROWS=200
+
+def _am_table_row(d):
+    sd=d.get('slope_details',{}); w52=d.get('week52_percentile')
+    return {
+        '✓':'✅' if d.get('is_tradable') else '',
+        'SYM':d['symbol'], 'BAND':f"{d['threshold_pct']:.2f}%",
+        'STS':d['stasis'], 'DIR':d.get('direction') or '—',
+        'SMS':d.get('sms',0), 'FMS':d.get('fms',0), 'TMS':d.get('tms',0),
+        'REV5':fmt_slope(sd.get('Rev_5')), 'FCF5':fmt_slope(sd.get('FCF_5')),
+        'FCFY':f"{sd['FCFY']*100:.1f}%" if sd.get('FCFY') else '—',
+        '52W':f"{w52:.0f}%" if w52 is not None else '—',
+        'PRICE':f"${d['current_price']:.2f}" if d.get('current_price') else '—',
+        'TP':f"${d['take_profit']:.2f}" if d.get('take_profit') else '—',
+        'SL':f"${d['stop_loss']:.2f}" if d.get('stop_loss') else '—',
+        'R:R':fmt_rr(d.get('risk_reward')), 'DUR':d.get('stasis_duration_str','—'),
+    }
+
+def _top_k(key, idx, k):
+    v=key[idx]
+    if len(idx)>k:
+        kth=np.partition(v,k-1)[k-1]; lo=v<kth
+        keep=lo|((v==kth)&(np.cumsum(v==kth)<=k-lo.sum())); idx,v=idx[keep],v[keep]
+    return idx[np.argsort(v,kind='stable')]
+
+class AMIndex:
+    __slots__=('slot','rows','free','valid','trad','dir','keys')
+    _DIRS={'LONG':1,'SHORT':2}
+    def __init__(self, cap=1024):
+        self.slot={}; self.rows=[None]*cap; self.free=[]; self.valid=np.zeros(cap,bool)
+        self.trad=np.zeros(cap,bool); self.dir=np.zeros(cap,np.int8)
+        self.keys={fs:np.zeros(cap) for fs in AM_SORTS}
+    def _grow(self):
+        n=len(self.rows); self.rows.extend([None]*n)
+        for a in ('valid','trad','dir'): setattr(self,a,np.concatenate([getattr(self,a),np.zeros(n,getattr(self,a).dtype)]))
+        self.keys={fs:np.concatenate([v,np.zeros(n)]) for fs,v in self.keys.items()}
+    def set(self, key, d):
+        i=self.slot.get(key)
+        if i is None:
+            if self.free: i=self.free.pop()
+            else:
+                i=len(self.slot)
+                if i>=len(self.rows): self._grow()
+            self.slot[key]=i; self.valid[i]=True
+        self.rows[i]=d; self.trad[i]=bool(d.get('is_tradable')); self.dir[i]=self._DIRS.get(d.get('direction'),0)
+        k=self.keys; w52=d.get('week52_percentile')
+        k['tms'][i]=-d.get('tms',0); k['fms'][i]=-d.get('fms',0); k['stasis'][i]=-d['stasis']
+        k['52w'][i]=999 if w52 is None else w52
+    def drop(self, key):
+        i=self.slot.pop(key,None)
+        if i is None: return
+        self.rows[i]=None; self.valid[i]=False; self.trad[i]=False; self.free.append(i)
+    def retain(self, keys):
+        for key in set(self.slot).difference(keys): self.drop(key)
+    def views(self, k=AM_TABLE_ROWS):
+        views={}; fmt={}; dirs={'ALL':None,'LONG':1,'SHORT':2}
+        for fm in AM_MODES:
+            base=self.trad if fm=='tradable' else self.valid
+            for fd,code in dirs.items():
+                idx=np.flatnonzero(base if code is None else base&(self.dir==code))
+                for fs in AM_SORTS:
+                    top=_top_k(self.keys[fs],idx,k).tolist()
+                    views[(fm,fd,fs)]=[fmt[i] if i in fmt else fmt.setdefault(i,_am_table_row(self.rows[i])) for i in top]
+        t=self.trad
+        return views,{'total':len(self.slot),'tradable':int(t.sum()),'long':int((t&(self.dir==1)).sum()),'short':int((t&(self.dir==2)).sum())}
+
+@dataclass(frozen=True, slots=True)
+class AMSnapshot:
+    version: int
+    time: float
+    rows: tuple
+    views: dict = field(default_factory=dict)
+    counts: dict = field(default_factory=dict)
+    def __len__(self): return len(self.rows)
+    def view(self, fm, fd, fs):
+        return self.views.get(('tradable' if fm=='tradable' else 'all',fd,fs if fs in AM_SORTS else 'tms'),[])
+
+class AMEvents:
+    def __init__(self, maxlen=20000):
+        self.log=deque(maxlen=maxlen); self.seq=0; self.state=None; self.cond=threading.Condition()
+    def diff(self, rows, partial=False):
+        with self.cond:
+            if partial and self.state is None: return ()
+            return self._diff(rows,partial)
+    def _diff(self, rows, partial):
+        first=self.state is None; prev=self.state or {}; state=prev if partial else {}; out=[]; now=round(time.time(),3)
+        for d in rows:
+            key=(d['symbol'],d['threshold']); cur=(d['is_tradable'],d['direction'],d['stasis'],d['take_profit'],d['stop_loss'])
+            old=prev.get(key); state[key]=cur
+            if first or old==cur: continue
+            if old is None: old=(False,None,0,None,None)
+            types=[]
+            if cur[0]!=old[0]: types.append('tradable' if cur[0] else 'untradable')
+            if cur[1]!=old[1] and cur[1] is not None: types.append('direction')
+            if cur[2]>old[2] and cur[2]>=2: types.append('stasis')
+            if cur[3:]!=old[3:] and cur[3] is not None: types.append('levels')
+            for t in types:
+                self.seq+=1
+                out.append({'seq':self.seq,'t':now,'type':t,'sym':key[0],'th':key[1],'dir':cur[1],'stasis':cur[2],
+                    'tms':d.get('tms',0),'price':d.get('current_price'),'tp':cur[3],'sl':cur[4]})
+        self.state=state; self.extend(out)
+        return tuple(out)
+    def extend(self, events):
+        if not events: return
+        with self.cond:
+            self.log.extend(events); self.seq=max(self.seq,events[-1]['seq']); self.cond.notify_all()
+    def reset(self):
+        with self.cond: self.log.clear(); self.seq=0; self.state=None; self.cond.notify_all()
+    def since(self, seq, timeout=None):
+        # a seq ahead of ours means the log restarted; a seq behind the ring means events were dropped
+        with self.cond:
+            if seq>self.seq: return [{'seq':self.seq,'type':'reset','t':round(time.time(),3)}]
+            if not self.log or self.log[-1]['seq']<=seq: self.cond.wait(timeout)
+            if not self.log or self.log[-1]['seq']<=seq: return []
+            first=self.log[0]['seq']
+            if first>seq+1: return [{'seq':first-1,'type':'gap','from':seq+1,'to':first-1,'t':round(time.time(),3)},*self.log]
+            return [e for e in self.log if e['seq']>seq]
+
 class BitstreamManager:
     def __init__(self):
         self.lock=threading.Lock(); self.streams={}; self.is_running=False
-        self.cached_am_data=[]; self.cache_lock=threading.Lock()
+        self.am=AMSnapshot(0,0.0,()); self.recent=deque(maxlen=16); self.events=AMEvents()
         self.initialized=False; self.backfill_complete=False; self.backfill_progress=0
+        self.engine=None; self.shards=None; self._rows={}; self.index=AMIndex(); self._evver={}
     def backfill(self):
-        print("\n"+"="*60+"\n📜 BACKFILLING\n"+"="*60); hist={}
-        for i,sym in enumerate(config.symbols):
-            bars=fetch_historical_bars(sym,config.history_days)
-            if bars: hist[sym]=bars
-            self.backfill_progress=int((i+1)/len(config.symbols)*100)
-            if (i+1)%25==0: print(f"   📊 {i+1}/{len(config.symbols)} ({self.backfill_progress}%)")
-            time.sleep(0.12)
+        print("\n"+"="*60+"\n📜 BACKFILLING\n"+"="*60)
+        if config.shards>0: self.shards=ShardPool(config.shards)
+        restored=self.restore() if config.checkpoint_path and self.shards is None else set()
+        todo=[sym for sym in config.symbols if sym not in restored]
+        if todo: self._backfill(todo)
         with self.lock:
-            for sym,bars in hist.items():
-                if not bars: continue
-                vol=config.volumes.get(sym,10.0)
-                for th in config.thresholds:
-                    key=(sym,th); self.streams[key]=Bitstream(sym,th,bars[0]['close'],vol)
-                    for bar in bars: self.streams[key].process_price(bar['close'],bar['timestamp'])
+            if config.vector_engine and self.engine is None and self.shards is None:
+                self.engine=BitstreamEngine.from_streams(self.streams,config.symbols,config.thresholds)
         self.initialized=True; self.backfill_complete=True
-        tradable=sum(1 for s in self.streams.values() if s.current_stasis>=config.min_tradable_stasis and s.direction is not None and s.volume>1.0)
-        print(f"✅ Streams: {len(self.streams)} | Tradable: {tradable}"); print("="*60)
+        if self.shards is not None: print(f"✅ Shards: {self.shards.n} | Tradable: {self.shards.tradable}"); print("="*60); return
+        print(f"✅ Streams: {len(self.streams) or int(self.engine.active.sum())*len(config.thresholds)} | Tradable: {self._count_tradable()}"); print("="*60)
+    def _progress(self, n, total): self.backfill_progress=int(n/total*100)
+    def _backfill(self, symbols):
+        res=rest.map("Backfill",symbols,lambda sym: fetch_historical_arrays(sym,config.history_days),progress=self._progress)
+        series={sym:(c,_ms_to_ns(t)) for sym,(t,c) in ((k,v) for k,v in res.items() if v is not None)}
+        t0=time.time()
+        if self.shards is not None: self.shards.load(series)
+        else: self._load_series(series)
+        print(f"   Replay: {len(series)} symbols in {time.time()-t0:.1f}s")
+    def _load_series(self, series):
+        with self.lock:
+            if config.vector_engine:
+                if self.engine is None: self.engine=BitstreamEngine(config.symbols,config.thresholds,config.volumes)
+                self.engine.replay(series)
+            else:
+                eng=BitstreamEngine(list(series),config.thresholds,config.volumes)
+                self.streams.update(eng.to_streams(eng.replay(series,record=True)))
+    def _stream_stats(self):
+        if self.shards is not None: return self.shards.stats
+        e=self.engine
+        if e is not None: return int(e.active.sum())*e.shape[1],int(e.total_bits.sum()),self._count_tradable()
+        ss=list(self.streams.values()); return len(ss),sum(s.total_bits for s in ss),self._count_tradable()
+    def _count_tradable(self):
+        if self.engine is not None: return self.engine.count_tradable()
+        return sum(1 for s in self.streams.values() if s.current_stasis>=config.min_tradable_stasis and s.direction is not None and s.volume>1.0)
+    def checkpoint(self):
+        if self.shards is not None: return
+        with self.lock:
+            t=time.time()
+            if self.engine is not None:
+                kind='engine'; arrays={k:np.array(v) for k,v in self.engine.state().items()}
+                arrays['symbols']=np.array(self.engine.symbols)
+            else:
+                kind='streams'; keys=list(self.streams)
+                states=[self.streams[k].get_state() for k in keys]; hist=[self.streams[k].bits.arrays() for k in keys]
+        if kind=='streams':
+            arrays={'symbol':np.array([k[0] for k in keys]),'threshold':np.array([k[1] for k in keys],dtype=np.float64)}
+            cols=list(zip(*states)) if states else [()]*len(STREAM_STATE)
+            for (name,dt),col in zip(STREAM_STATE,cols): arrays[name]=np.array(col,dtype=dt)
+            arrays['hist_off']=np.concatenate([[0],np.cumsum([len(h[0]) for h in hist],dtype=np.int64)]).astype(np.int64)
+            for n,(name,dt) in enumerate((('hist_bit',np.int8),('hist_price',np.float64),('hist_ns',np.int64))):
+                arrays[name]=np.concatenate([h[n] for h in hist]).astype(dt) if hist else np.zeros(0,dtype=dt)
+        _write_checkpoint(config.checkpoint_path,arrays,{'kind':kind,'time':t,'thresholds':list(config.thresholds)})
+        return t
+    def restore(self):
+        ck=_read_checkpoint(config.checkpoint_path)
+        if ck is None: return set()
+        meta,arr=ck; age=time.time()-meta['time']; want=set(config.symbols)
+        if meta.get('thresholds')!=list(config.thresholds) or age>config.history_days*86400 or (meta['kind']=='engine')!=config.vector_engine:
+            print("⚠️ Checkpoint does not match current config, ignoring"); return set()
+        with self.lock:
+            if meta['kind']=='engine':
+                syms=[str(x) for x in arr['symbols']]
+                self.engine=BitstreamEngine(config.symbols,config.thresholds,config.volumes); self.engine.load_state(syms,arr)
+                restored={self.engine.symbols[i] for i in np.flatnonzero(self.engine.active)}
+            else:
+                off=np.asarray(arr['hist_off']); cols=[np.asarray(arr[k]) for k,_ in STREAM_STATE]
+                hb,hp,hn=arr['hist_bit'],arr['hist_price'],arr['hist_ns']
+                for r,(sym,th) in enumerate(zip(arr['symbol'].tolist(),arr['threshold'].tolist())):
+                    if sym not in want: continue
+                    a,b=off[r],off[r+1]
+                    self.streams[(sym,th)]=Bitstream.from_state(sym,th,tuple(c[r] for c in cols),hb[a:b],hp[a:b],hn[a:b])
+                restored={k[0] for k in self.streams}
+        print(f"♻️ Restored {len(restored)} symbols from checkpoint ({age/60:.0f} min old)")
+        since=int(meta['time']*1000)
+        res=rest.map("Catch-up",sorted(restored),lambda sym: fetch_historical_arrays(sym,config.history_days,since=since),progress=self._progress)
+        ticks={sym:list(zip(v[0].tolist(),v[1].tolist())) for sym,v in res.items() if v is not None}
+        with self.lock: self._apply_ticks(ticks)
+        return restored
+    def _checkpoint_loop(self):
+        while self.is_running:
+            time.sleep(config.checkpoint_interval)
+            try: t0=time.time(); self.checkpoint(); print(f"💾 Checkpoint written in {time.time()-t0:.1f}s")
+            except Exception as e: print(f"Checkpoint err: {e}")
     def start(self):
         self.is_running=True
         threading.Thread(target=self._process,daemon=True).start()
         threading.Thread(target=self._cache,daemon=True).start()
+        if config.checkpoint_path and self.shards is None: threading.Thread(target=self._checkpoint_loop,daemon=True).start()
     def _process(self):
         while self.is_running:
-            time.sleep(0.1)
-            if not self.backfill_complete: continue
-            prices=price_feed.get_prices(); ts=datetime.now()
-            with self.lock:
-                for sym,p in prices.items():
-                    for th in config.thresholds:
-                        k=(sym,th)
-                        if k in self.streams: self.streams[k].process_price(p,ts)
+            if not self.backfill_complete: time.sleep(0.1); continue
+            if config.tick_mode:
+                ticks=price_feed.pop_ticks(timeout=1.0)
+                if ticks:
+                    with metrics.locked(self.lock,'manager'), metrics.timer('stasis_cycle_seconds',stage='process'):
+                        self._apply_ticks(ticks); snaps=self._changed({sym:evs[-1][1] for sym,evs in ticks.items()})
+                    self._emit(snaps)
+                continue
+            prices=price_feed.pop_changed(timeout=1.0)
+            if not prices: continue
+            with metrics.locked(self.lock,'manager'), metrics.timer('stasis_cycle_seconds',stage='process'):
+                self._apply(prices,datetime.now()); snaps=self._changed(prices)
+            self._emit(snaps)
+    def _changed(self, prices):
+        # snapshots of AM streams whose bits moved since their last event diff; called under self.lock
+        if self.shards is not None or self.events.state is None: return []
+        seen=self._evver; out=[]
+        if self.engine is not None:
+            e=self.engine; cols=[j for j,th in enumerate(e.thresholds.tolist()) if th in config.am_thresholds]
+            for sym,p in prices.items():
+                i=e.index.get(sym)
+                if i is None or not e.active[i]: continue
+                for j in cols:
+                    v=int(e.version[i,j])
+                    if seen.get((i,j))!=v: seen[(i,j)]=v; out.append(e.get_snapshot(i,j,p))
+            return out
+        for sym,p in prices.items():
+            for th in config.am_thresholds:
+                st=self.streams.get((sym,th))
+                if st is not None and seen.get((sym,th))!=st.version: seen[(sym,th)]=st.version; out.append(st.get_snapshot(p))
+        return out
+    def _emit(self, snaps):
+        if snaps:
+            with metrics.timer('stasis_cycle_seconds',stage='events'): self.events.diff(self._score_many(snaps),partial=True)
+    def _apply(self, prices, ts):
+        if self.shards is not None: return self.shards.apply(prices,ts)
+        if self.engine is not None: return self.engine.process_prices(prices,ts)
+        for sym,p in prices.items():
+            for th in config.thresholds:
+                k=(sym,th)
+                if k in self.streams: self.streams[k].process_price(p,ts)
+    def _apply_ticks(self, ticks):
+        if self.shards is not None: return self.shards.apply_ticks(ticks)
+        if self.engine is not None: return self.engine.process_ticks(ticks)
+        for sym,evs in ticks.items():
+            ss=[self.streams[(sym,th)] for th in config.thresholds if (sym,th) in self.streams]
+            for ms,p in evs:
+                ts=_tick_time(ms)
+                for st in ss: st.process_price(p,ts)
     def _cache(self):
         while self.is_running:
             time.sleep(config.cache_refresh_interval)
             if not self.initialized: continue
-            prices=price_feed.get_prices(); snaps=[]
-            with self.lock:
-                for s in self.streams.values(): snaps.append(s.get_snapshot(prices.get(s.symbol)))
-            am=self._build_am(snaps)
-            with self.cache_lock: self.cached_am_data=am
+            with metrics.timer('stasis_cycle_seconds',stage='cache'): self._publish()
+    def _publish(self):
+        prices=price_feed.get_prices(); ix=self.index
+        with metrics.timer('stasis_cycle_seconds',stage='build_am'):
+            if self.shards is not None:
+                am=self.shards.am_rows(prices); keys=[(d['symbol'],d['threshold']) for d in am]
+                for key,d in zip(keys,am): ix.set(key,d)
+                ix.retain(keys)
+            else: am=self._am_rows(prices,ix)
+        with metrics.timer('stasis_cycle_seconds',stage='views'): views,counts=ix.views()
+        # unsharded events are emitted from _process as bits land; sharded ones (and the baseline) come from the snapshot
+        if self.shards is not None or self.events.state is None: self.events.diff(am)
+        self.am=AMSnapshot(self.am.version+1,time.time(),tuple(map(MappingProxyType,am)),views,counts)
+        self.recent.append(self.am)
+    def _am_rows(self, prices, index=None):
+        gen=config.reference_version; cache=self._rows; seen=[]; todo=[]
+        with metrics.locked(self.lock,'manager'):
+            if self.engine is not None:
+                e=self.engine; cols=[j for j,th in enumerate(e.thresholds.tolist()) if th in config.am_thresholds]
+                for i in np.flatnonzero(e.active).tolist():
+                    sym=e.symbols[i]; p=prices.get(sym)
+                    if p is None: p=float(e.live_price[i])
+                    for j in cols:
+                        key=(i,j); v=int(e.version[i,j]); ent=cache.get(key); seen.append(key)
+                        if ent is None or ent[0]!=v or ent[1]!=p or ent[2]!=gen:
+                            si=e.start_ns[i,j] if e.stasis[i,j]>=2 else None
+                            todo.append((key,v,p,_from_ns(si) if si is not None else None,e.get_snapshot(i,j,p)))
+            else:
+                for key,st in self.streams.items():
+                    if st.threshold not in config.am_thresholds: continue
+                    p=prices.get(st.symbol)
+                    if p is None: p=st.current_live_price
+                    ent=cache.get(key); seen.append(key)
+                    if ent is None or ent[0]!=st.version or ent[1]!=p or ent[2]!=gen:
+                        si=st.stasis_info
+                        todo.append((key,st.version,p,si.start_time if si else None,st.get_snapshot(p)))
+        for (key,v,p,start,_),row in zip(todo,self._score_many([t[4] for t in todo])): cache[key]=(v,p,gen,start,row)
+        now=datetime.now(); rows=[]; live=[]
+        for key in seen:
+            ent=cache[key]; row=ent[4]
+            if ent[3] is not None:
+                secs=(now-ent[3]).total_seconds(); live.append(len(rows))
+                row={**row,'duration_seconds':secs,'stasis_duration_str':_fmt_duration(secs)}
+            rows.append(row)
+        for k,sms in zip(live,stasis_merit_scores([rows[k] for k in live])): r=rows[k]; r['sms']=sms; r['tms']=sms+r['fms']
+        if index is not None:
+            fresh={t[0] for t in todo}
+            for key,row,ent in zip(seen,rows,map(cache.get,seen)):
+                if ent[3] is not None or key in fresh: index.set(key,row)
+        if len(cache)>len(seen):
+            for key in set(cache).difference(seen): del cache[key]
+            if index is not None: index.retain(seen)
+        return rows
+    def _score_many(self, snaps):
+        out=[]
+        for s,sms in zip(snaps,stasis_merit_scores(snaps)):
+            fms,sd=fundamental_merit_score(s['symbol'],s.get('week52_percentile'))
+            out.append({**s,'sms':sms,'fms':fms,'tms':sms+fms,'slope_details':sd})
+        return out
+    def _snapshots(self, prices):
+        with self.lock:
+            if self.engine is not None: return self.engine.snapshots(prices,config.am_thresholds)
+            return [s.get_snapshot(prices.get(s.symbol)) for s in self.streams.values()]
     def _build_am(self, snaps):
-        rows=[]
-        for s in snaps:
-            if s['threshold'] not in config.am_thresholds: continue
-            sms=calculate_stasis_merit_score(s)
-            fms,sd=calculate_fundamental_merit_score(s['symbol'],s.get('week52_percentile'))
-            rows.append({**s,'sms':sms,'fms':fms,'tms':sms+fms,'slope_details':sd})
+        return self._score_many([s for s in snaps if s['threshold'] in config.am_thresholds])
+    def get_am_data(self):
+        return self.am.rows
+    def get_am_snapshot(self, version=None):
+        if version is None: return self.am
+        return next((s for s in reversed(self.recent) if s.version==version),None)
+    def get_status(self):
+        return {**price_feed.get_status(),'fundamentals':len(config.fundamental_slopes),'initialized':self.initialized,
+            'backfill_complete':self.backfill_complete,'backfill_progress':self.backfill_progress}
+
+def _shard_main(conn, cfg):
+    config.__dict__.update(cfg.__dict__); m=BitstreamManager()
+    while True:
+        try: cmd,*args=conn.recv()
+        except EOFError: break
+        try:
+            if cmd=='prices': m._apply(*args)
+            elif cmd=='ticks': m._apply_ticks(*args)
+            elif cmd=='sync': config.fundamental_slopes,config.week52_data,config.reference_version=args
+            elif cmd=='load': m._load_series(*args); conn.send(m._count_tradable())
+            elif cmd=='am': conn.send((m._am_rows(*args),m._stream_stats()))
+        except Exception as e:
+            print(f"Shard err ({cmd}): {e}")
+            if cmd in ('load','am'): conn.send(None)
+
+class ShardPool:
+    def __init__(self, n):
+        ctx=mp.get_context('spawn'); self.n=n; self.conns=[]; self.procs=[]; self.tradable=0; self.stats=None
+        self.send_locks=[threading.Lock() for _ in range(n)]; self.req_lock=threading.Lock(); self.synced=-1
+        self.shard_of={s:k%n for k,s in enumerate(config.symbols)}
+        for k in range(n):
+            a,b=ctx.Pipe(); p=ctx.Process(target=_shard_main,args=(b,config),daemon=True,name=f"stasis-shard-{k}")
+            p.start(); self.conns.append(a); self.procs.append(p)
+        print(f"🧩 Started {n} shard workers")
+    def _split(self, d):
+        parts=[{} for _ in range(self.n)]
+        for s,v in d.items(): parts[self.shard_of.get(s,0)][s]=v
+        return parts
+    def _send(self, k, msg):
+        with self.send_locks[k]: self.conns[k].send(msg)
+    def _request(self, msgs):
+        with self.req_lock:
+            for k,m in enumerate(msgs): self._send(k,m)
+            return [c.recv() for c in self.conns]
+    def sync(self):
+        msg=('sync',config.fundamental_slopes,config.week52_data,config.reference_version)
+        for k in range(self.n): self._send(k,msg)
+        self.synced=config.reference_version
+    def load(self, series):
+        self.sync(); res=self._request([('load',p) for p in self._split(series)])
+        self.tradable=sum(r or 0 for r in res)
+    def apply(self, prices, ts):
+        for k,p in enumerate(self._split(prices)):
+            if p: self._send(k,('prices',p,ts))
+    def apply_ticks(self, ticks):
+        for k,p in enumerate(self._split(ticks)):
+            if p: self._send(k,('ticks',p))
+    def am_rows(self, prices):
+        if self.synced!=config.reference_version: self.sync()
+        rows=[]; res=[r for r in self._request([('am',p) for p in self._split(prices)]) if r]
+        for r,_ in res: rows.extend(r)
+        if len(res)==self.n: self.stats=tuple(map(sum,zip(*(st for _,st in res)))); self.tradable=self.stats[2]
         return rows
+
+def _address(a):
+    if ':' not in a: return a
+    h,p=a.rsplit(':',1); return (h,int(p))
+
+class AMPublisher:
+    def __init__(self, mgr, address, authkey):
+        self.mgr=mgr; self.listener=Listener(_address(address),authkey=authkey.encode())
+        self.conns=[]; self.lock=threading.Lock(); self.last=None; self.status=None; self.seq=0; self.boot=time.time()
+    def start(self):
+        threading.Thread(target=self._accept,daemon=True).start()
+        threading.Thread(target=self._run,daemon=True).start()
+        threading.Thread(target=self._forward,daemon=True).start()
+    def _accept(self):
+        while True:
+            try: c=self.listener.accept()
+            except Exception as e: print(f"Publish accept err: {e}"); continue
+            with self.lock:
+                try:
+                    c.send_bytes(pickle.dumps(('hello',self.boot)))
+                    if self.status: c.send_bytes(self.status)
+                    if self.last: c.send_bytes(self.last[1])
+                    c.send_bytes(pickle.dumps(('events',list(self.mgr.events.log)[-1000:])))
+                    self.conns.append(c)
+                except OSError: c.close()
+    def _send(self, data):
+        with self.lock:
+            for c in self.conns[:]:
+                try: c.send_bytes(data)
+                except OSError: self.conns.remove(c); c.close()
+    def _run(self):
+        while True:
+            time.sleep(config.cache_refresh_interval)
+            try:
+                self.status=pickle.dumps(('status',self.mgr.get_status())); self._send(self.status)
+                am=self.mgr.get_am_snapshot()
+                if am.version and (self.last is None or self.last[0]!=am.version):
+                    data=pickle.dumps(('am',am.version,am.time,[dict(r) for r in am.rows],am.views,am.counts),pickle.HIGHEST_PROTOCOL)
+                    with self.lock: self.last=(am.version,data)
+                    self._send(data)
+            except Exception as e: print(f"Publish err: {e}")
+    def _forward(self):
+        while True:
+            try:
+                batch=self.mgr.events.since(self.seq,timeout=1.0)
+                if batch: self.seq=batch[-1]['seq']; self._send(pickle.dumps(('events',batch)))
+            except Exception as e: print(f"Forward err: {e}"); time.sleep(1)
+
+class AMSubscriber:
+    def __init__(self, address, authkey):
+        self.address=_address(address); self.authkey=authkey.encode(); self.pid=None; self.boot=None
+        self.am=AMSnapshot(0,0.0,()); self.recent=deque(maxlen=16); self.status={}; self.events=AMEvents()
+    def _ensure(self):
+        if self.pid==os.getpid(): return
+        self.pid=os.getpid(); threading.Thread(target=self._run,daemon=True).start()
+    def _run(self):
+        while True:
+            try:
+                c=Client(self.address,authkey=self.authkey)
+                while True:
+                    msg=pickle.loads(c.recv_bytes())
+                    if msg[0]=='status': self.status=msg[1]; continue
+                    if msg[0]=='hello':
+                        if self.boot is not None and self.boot!=msg[1]: self.events.reset()
+                        self.boot=msg[1]; continue
+                    if msg[0]=='events': self.events.extend([e for e in msg[1] if e['seq']>self.events.seq]); continue
+                    _,v,t,rows,views,counts=msg
+                    self.am=AMSnapshot(v,t,tuple(map(MappingProxyType,rows)),views,counts); self.recent.append(self.am)
+            except Exception as e: print(f"Subscribe err: {e}"); self.status={}; time.sleep(2)
+    initialized=property(lambda self: self.get_status().get('initialized',False))
+    backfill_complete=property(lambda self: self.get_status().get('backfill_complete',False))
+    backfill_progress=property(lambda self: self.get_status().get('backfill_progress',0))
+    def get_status(self):
+        self._ensure(); return self.status
     def get_am_data(self):
-        with self.cache_lock: return copy.deepcopy(self.cached_am_data)
+        return self.get_am_snapshot().rows
+    def get_am_snapshot(self, version=None):
+        self._ensure()
+        if version is None: return self.am
+        return next((s for s in reversed(self.recent) if s.version==version),None)
 
-manager = BitstreamManager()
+# the channel carries pickles, so engine and web must share a real secret rather than a built-in default
+if config.role in ("engine","web") and not config.publish_authkey:
+    raise RuntimeError("STASIS_AUTHKEY must be set to the same secret for the engine and web roles")
+manager = AMSubscriber(config.publish_address,config.publish_authkey) if config.role=="web" else BitstreamManager()
 
 AM_CSS = """
 @import url('https://fonts.googleapis.com/css2?family=Orbitron:wght@400;700&display=swap');
@@ -723,6 +1810,7 @@ app.index_string = f'''<!DOCTYPE html>
 
 app.layout = html.Div([
     dcc.Store(id='fmode', data='tradable'),
+    dcc.Store(id='tbl-ver', data=None),
     dcc.Interval(id='tick', interval=1000, n_intervals=0),
     html.Div(id='_sym_bridge', style={'display': 'none'}),
 
@@ -807,11 +1895,10 @@ app.clientside_callback(
 def update_status(n):
     if not manager.backfill_complete:
         return html.Span(f"⏳ Initializing... {manager.backfill_progress}%", style={'color':'#aa6600'})
-    st=price_feed.get_status(); am_data=manager.get_am_data()
-    tradable=sum(1 for d in am_data if d.get('is_tradable'))
+    st=manager.get_status(); tradable=manager.get_am_snapshot().counts.get('tradable',0)
     if st['connected']==0:
         return html.Span(f"🔴 Connecting... | {tradable} tradable", style={'color':'#aa6600'})
-    return html.Span(f"🟢 LIVE {st['connected']}/{st['total']} | 📨 {st['messages']:,} msgs | 📊 {len(config.fundamental_slopes)} fundamentals | 🎯 {tradable} tradable", style={'color':'#1a5c2a'})
+    return html.Span(f"🟢 LIVE {st['connected']}/{st['total']} | 📨 {st['messages']:,} msgs | 📊 {st['fundamentals']} fundamentals | 🎯 {tradable} tradable", style={'color':'#1a5c2a'})
 
 @app.callback([Output('f-all','active'),Output('f-trad','active'),Output('fmode','data')],
     [Input('f-all','n_clicks'),Input('f-trad','n_clicks')], prevent_initial_call=True)
@@ -820,58 +1907,196 @@ def toggle_filter(n1,n2):
     if 'f-all' in ctx.triggered[0]['prop_id']: return True,False,'all'
     return False,True,'tradable'
 
-@app.callback(Output('tbl','data'),
-    [Input('tick','n_intervals'),Input('fmode','data'),Input('f-dir','value'),Input('f-sort','value')])
-def update_table(n,fm,fd,fs):
-    if not manager.backfill_complete: return []
-    data=manager.get_am_data()
-    if not data: return []
-    rows=[]
-    for d in data:
-        if fm=='tradable' and not d.get('is_tradable'): continue
-        if fd!='ALL' and d.get('direction')!=fd: continue
-        sd=d.get('slope_details',{}); w52=d.get('week52_percentile')
-        rows.append({
-            '✓':'✅' if d.get('is_tradable') else '',
-            'SYM':d['symbol'], 'BAND':f"{d['threshold_pct']:.2f}%",
-            'STS':d['stasis'], 'DIR':d.get('direction') or '—',
-            'SMS':d.get('sms',0), 'FMS':d.get('fms',0), 'TMS':d.get('tms',0),
-            'REV5':fmt_slope(sd.get('Rev_5')), 'FCF5':fmt_slope(sd.get('FCF_5')),
-            'FCFY':f"{sd['FCFY']*100:.1f}%" if sd.get('FCFY') else '—',
-            '52W':f"{w52:.0f}%" if w52 is not None else '—',
-            'PRICE':f"${d['current_price']:.2f}" if d.get('current_price') else '—',
-            'TP':f"${d['take_profit']:.2f}" if d.get('take_profit') else '—',
-            'SL':f"${d['stop_loss']:.2f}" if d.get('stop_loss') else '—',
-            'R:R':fmt_rr(d.get('risk_reward')), 'DUR':d.get('stasis_duration_str','—'),
-            '_tms':d.get('tms',0),'_fms':d.get('fms',0),'_stasis':d['stasis'],
-            '_52w':w52 if w52 is not None else 999,
-        })
-    if not rows: return []
-    df=pd.DataFrame(rows)
-    sort_map={'tms':'_tms','fms':'_fms','stasis':'_stasis','52w':'_52w'}
-    col=sort_map.get(fs,'_tms')
-    df=df.sort_values(col,ascending=(fs=='52w')).head(200)
-    df=df.drop(columns=['_tms','_fms','_stasis','_52w'],errors='ignore')
-    return df.to_dict('records')
+def _patch_rows(old, new):
+    # fall back to the full list on cells, not rows: DUR/PRICE touch most rows but only one or two of their cells
+    p=Patch(); changed=0
+    for i,(a,b) in enumerate(zip(old,new)):
+        if a is b or a==b: continue
+        for c,v in b.items():
+            if a.get(c)!=v: p[i][c]=v; changed+=1
+    if not changed and len(old)==len(new): return no_update
+    if changed>sum(map(len,new))//2: return new
+    if len(new)>len(old): p.extend(new[len(old):])
+    for i in range(len(old)-1,len(new)-1,-1): del p[i]
+    return p
+
+@app.callback([Output('tbl','data'),Output('tbl-ver','data')],
+    [Input('tick','n_intervals'),Input('fmode','data'),Input('f-dir','value'),Input('f-sort','value')],
+    State('tbl-ver','data'))
+def update_table(n,fm,fd,fs,seen):
+    if not manager.backfill_complete: return [],None
+    with metrics.timer('stasis_cycle_seconds',stage='update_table'): return _table_update(fm,fd,fs,seen)
+
+def _table_update(fm,fd,fs,seen):
+    snap=manager.get_am_snapshot(); key=[fm,fd,fs]
+    if seen and seen['k']==key:
+        if seen['v']==snap.version: return no_update,no_update
+        prev=manager.get_am_snapshot(seen['v'])
+        if prev is not None: return _patch_rows(prev.view(fm,fd,fs),snap.view(fm,fd,fs)),{'v':snap.version,'k':key}
+    return snap.view(fm,fd,fs),{'v':snap.version,'k':key}
 
 @server.route('/api/health')
 def health():
     return json.dumps({'status':'ok','app':'stasis_am','initialized':manager.initialized,
         'backfill_complete':manager.backfill_complete,'backfill_progress':manager.backfill_progress})
 
+def _csv(args, name, conv=str):
+    v=args.get(name)
+    try: return {conv(x) for x in v.split(',') if x} if v else None
+    except ValueError: raise ValueError(f"{name} must be a comma-separated list of numbers") from None
+
+def _num(args, name, conv=float, default=0):
+    v=args.get(name)
+    if not v: return default
+    try: x=conv(v)
+    except ValueError: raise ValueError(f"{name} must be {'an integer' if conv is int else 'a number'}") from None
+    if x!=x: raise ValueError(f"{name} must be a number")
+    return x
+
+AM_EVENT_TYPES = ('tradable','untradable','direction','stasis','levels')
+
+def _stream_params(q, last_id, events):
+    syms=_csv(q,'symbols',str.upper); ths=_csv(q,'thresholds',float); types=_csv(q,'types')
+    if types and not types<=set(AM_EVENT_TYPES): raise ValueError(f"types must be in {','.join(AM_EVENT_TYPES)}")
+    min_tms=_num(q,'min_tms'); seq=_num({'since':last_id or q.get('since')},'since',int,events.seq)
+    if seq<0: raise ValueError("since must be >= 0")
+    return syms,ths,types,min_tms,seq
+
+def _stream_match(e, syms, ths, types, min_tms):
+    if e['type'] in ('gap','reset'): return True
+    return not (syms and e['sym'] not in syms or ths and e['th'] not in ths or types and e['type'] not in types or e['tms']<min_tms)
+
+_stream_slots=threading.BoundedSemaphore(config.stream_slots)
+
+@server.route('/api/stream')
+def stream():
+    # each open stream holds a worker thread; stream_slots caps them so the rest of the pool keeps serving Dash
+    if isinstance(manager,AMSubscriber): manager._ensure()
+    events=manager.events
+    try: syms,ths,types,min_tms,seq=_stream_params(request.args,request.headers.get('Last-Event-ID'),events)
+    except ValueError as e: return Response(json.dumps({'error':str(e)}),400,mimetype='application/json')
+    if not _stream_slots.acquire(blocking=False):
+        return Response(json.dumps({'error':'stream slots exhausted'}),503,mimetype='application/json',headers={'Retry-After':'5'})
+    def gen():
+        nonlocal seq
+        yield f"retry: 2000\n: seq {seq}\n\n"
+        while True:
+            batch=events.since(seq,timeout=15)
+            if not batch: yield ": keepalive\n\n"; continue
+            seq=batch[-1]['seq']
+            out=''.join(f"id: {e['seq']}\nevent: {e['type']}\ndata: {json.dumps(e)}\n\n" for e in batch if _stream_match(e,syms,ths,types,min_tms))
+            if out: yield out
+    r=Response(gen(),mimetype='text/event-stream',headers={'Cache-Control':'no-cache','X-Accel-Buffering':'no'})
+    r.call_on_close(_stream_slots.release); return r
+
+def _am_params(args):
+    tr=args.get('tradable'); fd=args.get('direction','ALL').upper(); fs=args.get('sort'); limit=_num(args,'limit',int,None)
+    if tr is not None:
+        if tr.lower() not in ('1','true','yes','0','false','no'): raise ValueError("tradable must be true or false")
+        tr=tr.lower() in ('1','true','yes')
+    if fd not in AM_DIRS: raise ValueError(f"direction must be one of {','.join(AM_DIRS)}")
+    if fs is not None and fs not in AM_SORTS: raise ValueError(f"sort must be one of {','.join(AM_SORTS)}")
+    if limit is not None and limit<0: raise ValueError("limit must be >= 0")
+    return tr,fd,fs,_csv(args,'symbols',str.upper),_csv(args,'thresholds',float),_num(args,'min_tms'),limit
+
+def _am_filter(rows, args):
+    tr,fd,fs,syms,ths,min_tms,limit=_am_params(args)
+    out=[r for r in rows if (tr is None or bool(r['is_tradable'])==tr) and (fd=='ALL' or r['direction']==fd)
+        and (not syms or r['symbol'] in syms) and (not ths or r['threshold'] in ths) and r.get('tms',0)>=min_tms]
+    if fs=='52w': out.sort(key=lambda r: 999 if r.get('week52_percentile') is None else r['week52_percentile'])
+    elif fs: out.sort(key=lambda r: r.get(fs,0),reverse=True)
+    if limit is not None: out=out[:limit]
+    return out
+
+def _am_columns(rows, keys):
+    cols={}
+    for k in keys:
+        v=[r[k] for r in rows]
+        if any(isinstance(x,dict) for x in v): continue
+        if all(isinstance(x,bool) for x in v): cols[k]=np.array(v,dtype=bool)
+        elif all(x is None or isinstance(x,(int,float)) for x in v): cols[k]=np.array([np.nan if x is None else x for x in v],dtype=float)
+        else: cols[k]=np.array(['' if x is None else str(x) for x in v])
+    buf=io.BytesIO(); np.savez(buf,**cols); return buf.getvalue()
+
+_api_cache={}; _api_lock=threading.Lock()
+
+@server.route('/api/am')
+def api_am():
+    with metrics.timer('stasis_cycle_seconds',stage='api_am'): return _api_am()
+
+def _api_am():
+    if not manager.backfill_complete: return Response(json.dumps({'error':'initializing'}),503,mimetype='application/json')
+    snap=manager.get_am_snapshot(); fmt=request.args.get('format','json')
+    if fmt not in ('json','npz'): return Response(json.dumps({'error':f'unknown format {fmt}'}),400,mimetype='application/json')
+    try: _am_params(request.args)
+    except ValueError as e: return Response(json.dumps({'error':str(e)}),400,mimetype='application/json')
+    q=sorted(request.args.items(multi=True)); etag=f"{snap.version}-{zlib.crc32(repr(q).encode()):08x}"
+    if etag in request.if_none_match: r=Response(status=304); r.set_etag(etag); return r
+    gz='gzip' in request.headers.get('Accept-Encoding','')
+    with _api_lock: body=_api_cache.get((etag,gz))
+    if body is None:
+        rows=_am_filter(snap.rows,request.args)
+        body=_am_columns(rows,snap.rows[0] if snap.rows else ()) if fmt=='npz' else json.dumps({'version':snap.version,'time':snap.time,'count':len(rows),'rows':[dict(r) for r in rows]}).encode()
+        if gz: body=gzip.compress(body,compresslevel=5)
+        with _api_lock:
+            if any(k[0].split('-')[0]!=str(snap.version) for k in _api_cache): _api_cache.clear()
+            if len(_api_cache)<64: _api_cache[(etag,gz)]=body
+    r=Response(body,mimetype='application/octet-stream' if fmt=='npz' else 'application/json')
+    r.set_etag(etag); r.headers['Cache-Control']='no-cache'; r.headers['Vary']='Accept-Encoding'
+    r.headers['X-AM-Version']=str(snap.version)
+    if gz: r.headers['Content-Encoding']='gzip'
+    return r
+
+def _metric_samples():
+    g=[]; c=[]; now=time.time(); snap=manager.get_am_snapshot()
+    g.append(('stasis_snapshot_version',{},snap.version))
+    g.append(('stasis_snapshot_age_seconds',{},now-snap.time if snap.time else -1))
+    for k,v in snap.counts.items(): g.append(('stasis_am_rows',{'kind':k},v))
+    if isinstance(manager,BitstreamManager):
+        st=price_feed.get_status(); c.append(('stasis_ws_messages_total',{},st['messages']))
+        c.append(('stasis_ws_frames_total',{},price_feed.frame_count))
+        g.append(('stasis_ws_messages_per_second',{},price_feed.rate()))
+        g.append(('stasis_symbols_live',{},st['connected'])); c.append(('stasis_ticks_dropped_total',{},price_feed.ticks_dropped))
+        stats=manager._stream_stats()
+        if stats is not None:
+            n,bits,tradable=stats; g.append(('stasis_streams',{},n)); c.append(('stasis_bits_total',{},bits))
+            g.append(('stasis_tradable_streams',{},tradable))
+        for k,v in rest.stage_times.items(): g.append(('stasis_startup_stage_seconds',{'stage':k},round(v,3)))
+        for k,v in metrics.stages.items(): g.append(('stasis_startup_stage_seconds',{'stage':k},round(v,3)))
+        c.append(('stasis_rest_retries_total',{},rest.retried))
+    return g,c
+
+@server.route('/api/metrics')
+def api_metrics():
+    return Response(metrics.render(*_metric_samples()),mimetype='text/plain; version=0.0.4')
+
 _init_done=False; _init_lock=threading.Lock()
 def initialize():
-    global _init_done
+    global _init_done, recorder, disk_cache
     with _init_lock:
         if _init_done: return
         print("="*70); print("  STASIS AM SERVER"); print("  © 2026 Truth Communications LLC"); print("="*70)
         print(f"\n🎯 Symbols: {len(config.symbols)}")
-        config.week52_data=fetch_52_week_data(); config.volumes=fetch_volume_data()
-        fetch_all_fundamental_data(); manager.backfill(); price_feed.start(); manager.start()
+        if config.record_path: recorder=SessionRecorder(config.record_path)
+        elif config.cache_path: disk_cache=DataCache(config.cache_path)
+        if config.role=="engine": AMPublisher(manager,config.publish_address,config.publish_authkey).start()
+        with metrics.stage('Daily data'):
+            if config.grouped_daily:
+                daily_bars.load(); config.week52_data=daily_bars.week52(); config.volumes=daily_bars.volumes()
+                threading.Thread(target=daily_bars.run_refresh,daemon=True).start()
+            else: config.week52_data=fetch_52_week_data(); config.volumes=fetch_volume_data()
+        with metrics.stage('Fundamentals total'): fetch_all_fundamental_data()
+        with metrics.stage('Backfill total'): manager.backfill()
+        price_feed.start(); manager.start()
         print(f"\n✅ READY — {len(config.fundamental_slopes)} fundamentals"); print("="*70); _init_done=True
 
-_init_thread=threading.Thread(target=initialize,daemon=True); _init_thread.start()
+_init_thread=threading.Thread(target=initialize,daemon=True)
+if mp.current_process().name=="MainProcess" and config.role not in ("web","offline"): _init_thread.start()
 
 if __name__=='__main__':
-    _init_thread.join(); port=int(os.environ.get('PORT',8050))
+    if config.role=="engine":
+        _init_thread.join()
+        while True: time.sleep(3600)
+    if config.role!="web": _init_thread.join()
+    port=int(os.environ.get('PORT',8050))
     print(f"\n🟢 http://0.0.0.0:{port}\n"); app.run(debug=False,host='0.0.0.0',port=port)
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+STASIS AM — offline benchmark suite
+Synthetic random-walk sessions, no network. Results are written as JSON.
+
+    python bench.py --symbols 100,1000,10000 --out bench.json
+"""
+
+import os
+os.environ["STASIS_ROLE"] = "offline"
+
+import argparse
+import gc
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import numpy as np
+
+import app
+
+def make_session(n, bars, ticks, seed=7):
+    rng=np.random.default_rng(seed)
+    syms=[f"S{i:05d}" for i in range(n)]
+    p0=np.exp(rng.uniform(np.log(5),np.log(500),n))
+    vol=rng.uniform(0.0005,0.004,n)
+    steps=rng.standard_normal((bars+ticks,n))*vol
+    steps[rng.random((bars+ticks,n))<0.3]=0.0
+    path=p0*np.exp(np.cumsum(steps,axis=0))
+    end_ms=int(time.time()//60*60*1000)-ticks*1000
+    t_ms=end_ms-np.arange(bars,0,-1,dtype=np.int64)*60000
+    return syms,path[:bars].T.copy(),t_ms,path[bars:].copy(),end_ms
+
+def setup(syms, thresholds, engine):
+    c=app.config; c.symbols=syms; c.vector_engine=engine; c.thresholds=thresholds
+    c.am_thresholds=[t for t in app.Config().am_thresholds if t in thresholds] or thresholds
+    c.volumes={s:10.0 for s in syms}; c.week52_data={}; c.fundamental_slopes={}; c.shards=0
+    app.price_feed=app.PolygonPriceFeed(); m=app.manager=app.BitstreamManager()
+    return m
+
+def stats(name, samples, units, **kw):
+    s=np.asarray(samples,dtype=float); tot=s.sum()
+    return {'name':name,**kw,'calls':len(s),'units':int(units),
+        'throughput':units/tot if tot else None,'p50_us':float(np.percentile(s,50)*1e6),
+        'p99_us':float(np.percentile(s,99)*1e6),'mean_us':float(s.mean()*1e6)}
+
+def timed(fn, reps):
+    out=[]
+    for _ in range(reps):
+        t0=time.perf_counter(); fn(); out.append(time.perf_counter()-t0)
+    return out
+
+def peak_mb(fn):
+    gc.collect(); tracemalloc.start()
+    try: fn()
+    finally: _,peak=tracemalloc.get_traced_memory(); tracemalloc.stop()
+    return peak/2**20
+
+def run_case(n, thresholds, engine, bars, ticks, reps, seed):
+    syms,closes,t_ms,tick_px,end_ms=make_session(n,bars,ticks,seed)
+    ns=app._ms_to_ns(t_ms); series={s:(closes[i],ns) for i,s in enumerate(syms)}
+    kw={'symbols':n,'thresholds':len(thresholds),'mode':'engine' if engine else 'streams'}
+    res=[]
+    s=[]
+    for _ in range(max(3,reps//10)):
+        m=setup(syms,thresholds,engine); gc.collect()
+        t0=time.perf_counter(); m._load_series(series); s.append(time.perf_counter()-t0)
+    r=stats('replay',s,n*bars*len(s),**kw); r['peak_mb']=peak_mb(lambda: setup(syms,thresholds,engine)._load_series(series))
+    res.append(r)
+    m=setup(syms,thresholds,engine); m._load_series(series)
+    m.initialized=m.backfill_complete=True
+    base=datetime.fromtimestamp(end_ms/1000); k=[0]
+    def tick():
+        i=k[0]%ticks; k[0]+=1
+        app.price_feed._apply([(j,float(p),end_ms+i*1000) for j,p in enumerate(tick_px[i])])
+        m._apply(app.price_feed.pop_changed(0),base+timedelta(seconds=k[0]))
+    if engine:
+        s=timed(tick,min(reps,ticks)); r=stats('engine.process_prices',s,n*len(s),**kw)
+    else:
+        streams=list(m.streams.values()); p=tick_px[0]; idx={s:j for j,s in enumerate(syms)}
+        px=[float(p[idx[st.symbol]])*1.003 for st in streams]; ts=base+timedelta(seconds=1)
+        sample=[]
+        for st,x in zip(streams,px):
+            t=time.perf_counter(); st.process_price(x,ts); sample.append(time.perf_counter()-t)
+        r=stats('Bitstream.process_price',sample,len(sample),**kw); ts=base+timedelta(seconds=2)
+        r['peak_mb']=peak_mb(lambda: [st.process_price(x/1.003,ts) for st,x in zip(streams,px)]); res.append(r)
+        s=timed(tick,min(reps,ticks)); r=stats('manager.apply',s,n*len(s),**kw)
+    r['peak_mb']=peak_mb(tick); res.append(r)
+    def cycle(): tick(); m._publish()
+    s=timed(cycle,reps); r=stats('cache_cycle',s,len(s),**kw); r['peak_mb']=peak_mb(cycle); res.append(r)
+    prices=app.price_feed.get_prices()
+    full=lambda: m._build_am(m._snapshots(prices))
+    s=timed(full,max(1,reps//5)); r=stats('build_am_full',s,len(s),**kw); r['peak_mb']=peak_mb(full); res.append(r)
+    s=timed(m.get_am_data,reps*10); r=stats('get_am_data',s,len(s),**kw); r['peak_mb']=peak_mb(m.get_am_data); res.append(r)
+    combos=[(fm,fd,fs) for fm in app.AM_MODES for fd in app.AM_DIRS for fs in app.AM_SORTS]
+    s=[t for c in combos for t in timed(lambda c=c: app._table_update(*c,None),5)]
+    r=stats('update_table',s,len(s),**kw); r['peak_mb']=peak_mb(lambda: [app._table_update(*c,None) for c in combos]); res.append(r)
+    v={'v':m.am.version,'k':list(combos[0])}; same=lambda: app._table_update(*combos[0],v)
+    s=timed(same,reps*10); r=stats('update_table_unchanged',s,len(s),**kw); r['peak_mb']=peak_mb(same); res.append(r)
+    return res
+
+def main():
+    ap=argparse.ArgumentParser(description="STASIS AM offline benchmarks")
+    ap.add_argument('--symbols',default='100,1000',help='comma-separated universe sizes')
+    ap.add_argument('--thresholds',type=int,default=0,help='number of thresholds (0 = all)')
+    ap.add_argument('--mode',choices=['streams','engine','both'],default='both')
+    ap.add_argument('--bars',type=int,default=390*app.config.history_days)
+    ap.add_argument('--ticks',type=int,default=120)
+    ap.add_argument('--reps',type=int,default=30)
+    ap.add_argument('--seed',type=int,default=7)
+    ap.add_argument('--out',default='bench.json')
+    a=ap.parse_args()
+    ths=list(app.Config().thresholds); ths=ths[:a.thresholds] if a.thresholds else ths
+    modes={'streams':[False],'engine':[True],'both':[False,True]}[a.mode]
+    try: commit=subprocess.run(['git','rev-parse','HEAD'],capture_output=True,text=True,cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError: commit=None
+    out={'meta':{'commit':commit,'time':datetime.now().isoformat(timespec='seconds'),'python':platform.python_version(),
+        'numpy':np.__version__,'machine':platform.machine(),'args':vars(a)},'results':[]}
+    for n in [int(x) for x in a.symbols.split(',') if x]:
+        for engine in modes:
+            print(f"▶ {n} symbols × {len(ths)} thresholds ({'engine' if engine else 'streams'})")
+            for r in run_case(n,ths,engine,a.bars,a.ticks,a.reps,a.seed):
+                out['results'].append(r)
+                print(f"   {r['name']:<24} p50 {r['p50_us']:>11.1f}µs  p99 {r['p99_us']:>11.1f}µs"+(f"  peak {r['peak_mb']:.1f}MB" if 'peak_mb' in r else ""))
+    with open(a.out,'w') as f: json.dump(out,f,indent=1)
+    print(f"✅ Wrote {a.out}")
+
+if __name__=='__main__':
+    main()
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+STASIS AM — recorded-session replay server
+Serves a session recorded with STASIS_RECORD=<dir> as a local Polygon stand-in:
+WebSocket aggregates on ws://HOST:PORT/stocks and REST on http://HOST:PORT.
+
+    python replay.py sessions/2026-10-16 --speed 10
+    POLYGON_WS_URL=ws://127.0.0.1:8766/stocks POLYGON_REST_URL=http://127.0.0.1:8766 python app.py
+"""
+
+import argparse
+import base64
+import gzip
+import hashlib
+import json
+import os
+import re
+import socket
+import struct
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+WS_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+_MS = re.compile(r"(?<![\d.])\d{13}(?![\d.])")
+
+def _open(path):
+    if os.path.exists(path): return open(path)
+    if os.path.exists(path+'.gz'): return gzip.open(path+'.gz','rt')
+    return None
+
+def _key(path, query):
+    return path+'?'+urlencode(sorted((k,v) for k,v in parse_qsl(query) if k!='apiKey'))
+
+def _loose(key):
+    return _MS.sub('*',_DATE.sub('*',key))
+
+class Session:
+    def __init__(self, path):
+        with open(os.path.join(path,'meta.json')) as f: self.meta=json.load(f)
+        self.rest={}; self.loose={}; self.frames=[]
+        f=_open(os.path.join(path,'rest.jsonl'))
+        for line in (f or ()):
+            e=json.loads(line); self.rest[e['key']]=(e['status'],e['body']); self.loose[_loose(e['key'])]=(e['status'],e['body'])
+        f=_open(os.path.join(path,'frames.jsonl'))
+        for line in (f or ()): t,msg=json.loads(line); self.frames.append((t,msg))
+        self.day_shift=(datetime.now().date()-datetime.strptime(self.meta['date'],'%Y-%m-%d').date()).days
+        print(f"📼 Session {self.meta['date']}: {len(self.frames):,} frames, {len(self.rest):,} REST responses, shifted {self.day_shift:+d} days")
+    def _unshift(self, key):
+        d=timedelta(days=self.day_shift); ms=self.day_shift*86400000
+        key=_DATE.sub(lambda m: (datetime.strptime(m.group(),'%Y-%m-%d')-d).strftime('%Y-%m-%d'),key)
+        return _MS.sub(lambda m: str(int(m.group())-ms),key)
+    def lookup(self, path, query):
+        k=_key(path,query)
+        hit=self.rest.get(k) or self.rest.get(self._unshift(k)) or self.loose.get(_loose(k))
+        if hit is None: return 404,json.dumps({'status':'NOT_FOUND','results':[]})
+        status,body=hit
+        if not self.day_shift: return status,body
+        try: data=json.loads(body)
+        except ValueError: return status,body
+        ms=self.day_shift*86400000
+        for r in data.get('results') or () if isinstance(data,dict) else ():
+            if isinstance(r,dict) and isinstance(r.get('t'),int): r['t']+=ms
+        return status,json.dumps(data)
+
+class WSClient:
+    def __init__(self, sock):
+        self.sock=sock; self.lock=threading.Lock(); self.subs=set(); self.ready=threading.Event(); self.alive=True
+    def send(self, text):
+        data=text.encode(); n=len(data)
+        if n<126: hdr=struct.pack('!BB',0x81,n)
+        elif n<65536: hdr=struct.pack('!BBH',0x81,126,n)
+        else: hdr=struct.pack('!BBQ',0x81,127,n)
+        with self.lock:
+            try: self.sock.sendall(hdr+data)
+            except OSError: self.alive=False
+    def _read(self, n):
+        buf=b''
+        while len(buf)<n:
+            chunk=self.sock.recv(n-len(buf))
+            if not chunk: raise ConnectionError("closed")
+            buf+=chunk
+        return buf
+    def recv(self):
+        b0,b1=self._read(2); op=b0&0x0f; n=b1&0x7f
+        if n==126: n=struct.unpack('!H',self._read(2))[0]
+        elif n==127: n=struct.unpack('!Q',self._read(8))[0]
+        mask=self._read(4) if b1&0x80 else None; data=self._read(n)
+        if mask: data=bytes(c^mask[i%4] for i,c in enumerate(data))
+        return op,data
+    def wants(self, m):
+        if '*' in self.subs: return True
+        return f"{m.get('ev')}.{m.get('sym') or m.get('S')}" in self.subs
+    def serve(self):
+        self.send(json.dumps([{'ev':'status','status':'connected','message':'Connected Successfully'}]))
+        while self.alive:
+            op,data=self.recv()
+            if op==8: break
+            if op==9:
+                with self.lock: self.sock.sendall(struct.pack('!BB',0x8a,len(data))+data)
+                continue
+            if op!=1: continue
+            msg=json.loads(data)
+            if msg.get('action')=='auth':
+                self.send(json.dumps([{'ev':'status','status':'auth_success','message':'authenticated'}]))
+            elif msg.get('action')=='subscribe':
+                p=[x for x in msg.get('params','').split(',') if x]; self.subs.update(p); self.ready.set()
+                self.send(json.dumps([{'ev':'status','status':'success','message':f'subscribed to: {x}'} for x in p]))
+            elif msg.get('action')=='unsubscribe': self.subs.difference_update(msg.get('params','').split(','))
+        self.alive=False
+
+class Player:
+    def __init__(self, session, speed, loop, start_delay):
+        self.s=session; self.speed=speed; self.loop=loop; self.start_delay=start_delay
+        self.clients=[]; self.lock=threading.Lock(); self.started=False; self.sent=0
+    def add(self, c):
+        with self.lock:
+            self.clients.append(c)
+            if not self.started: self.started=True; threading.Thread(target=self._run,daemon=True).start()
+    def _run(self):
+        time.sleep(self.start_delay)
+        while True:
+            self._play()
+            if not self.loop: break
+        print(f"⏹  Replay finished: {self.sent:,} frames")
+    def _play(self):
+        fr=self.s.frames
+        if not fr: return
+        t0=fr[0][0]; w0=time.time(); shift=int(w0*1000)-t0
+        for t,msg in fr:
+            if self.speed>0:
+                wait=w0+(t-t0)/1000/self.speed-time.time()
+                if wait>0: time.sleep(wait)
+            try: data=json.loads(msg)
+            except ValueError: continue
+            data=data if isinstance(data,list) else [data]
+            for m in data:
+                for f in ('s','e','t'):
+                    if isinstance(m.get(f),int): m[f]+=shift
+            with self.lock: cs=[c for c in self.clients if c.alive]; self.clients=cs
+            for c in cs:
+                out=[m for m in data if c.wants(m)]
+                if out: c.send(json.dumps(out))
+            self.sent+=1
+
+def make_handler(session, player):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version="HTTP/1.1"
+        def log_message(self, *a): pass
+        def do_GET(self):
+            if self.headers.get('Upgrade','').lower()=='websocket': return self._ws()
+            u=urlsplit(self.path); status,body=session.lookup(u.path,u.query); data=body.encode()
+            self.send_response(status); self.send_header('Content-Type','application/json')
+            self.send_header('Content-Length',str(len(data))); self.end_headers(); self.wfile.write(data)
+        def _ws(self):
+            acc=base64.b64encode(hashlib.sha1(self.headers['Sec-WebSocket-Key'].encode()+WS_GUID).digest()).decode()
+            self.send_response(101); self.send_header('Upgrade','websocket'); self.send_header('Connection','Upgrade')
+            self.send_header('Sec-WebSocket-Accept',acc); self.end_headers(); self.wfile.flush()
+            c=WSClient(self.connection); player.add(c)
+            try: c.serve()
+            except (ConnectionError,OSError,ValueError): pass
+            c.alive=False; self.close_connection=True
+    return Handler
+
+def main():
+    ap=argparse.ArgumentParser(description="Replay a recorded STASIS AM session as a local Polygon stand-in")
+    ap.add_argument('session',help='directory written with STASIS_RECORD')
+    ap.add_argument('--host',default='127.0.0.1')
+    ap.add_argument('--port',type=int,default=8766)
+    ap.add_argument('--speed',type=float,default=1.0,help='playback multiplier; 0 = as fast as possible')
+    ap.add_argument('--start-delay',type=float,default=5.0,help='seconds after the first client connects')
+    ap.add_argument('--loop',action='store_true')
+    a=ap.parse_args()
+    s=Session(a.session); p=Player(s,a.speed,a.loop,a.start_delay)
+    srv=ThreadingHTTPServer((a.host,a.port),make_handler(s,p)); srv.daemon_threads=True
+    print(f"🟢 ws://{a.host}:{a.port}/stocks  http://{a.host}:{a.port}  speed {'max' if a.speed<=0 else f'{a.speed:g}x'}")
+    try: srv.serve_forever()
+    except KeyboardInterrupt: pass
+
+if __name__=='__main__':
+    main()